@@ -366,7 +366,7 @@ if __name__ == "__main__":
     
     print(f"\n\n🎯 NEXT STEPS:")
     print("   1. Explore the full email agent implementation")
-    print("   2. Run: python src/main.py")
+    print("   2. Run: python -m src.main")
     print("   3. Try: python -m src.cli interactive") 
     print("   4. Study: src/agent/ directory for detailed examples")
     print("   5. Build: Your own specialized agents!")
\ No newline at end of file
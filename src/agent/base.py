@@ -2,8 +2,9 @@
 
 import json
 import logging
+import threading
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Callable
+from typing import Any, Dict, List, Optional, Callable, Tuple
 from datetime import datetime
 from pydantic import BaseModel
 
@@ -33,15 +34,18 @@ class AgentMemory:
         self.short_term: List[Dict] = []
         self.long_term: Dict[str, Any] = {}
         self.context: Dict[str, Any] = {}
+        # Tools may run concurrently and all record into short-term memory
+        self._lock = threading.Lock()
     
     def add_to_short_term(self, event: Dict):
         """Add event to short-term memory."""
         event["timestamp"] = datetime.now().isoformat()
-        self.short_term.append(event)
-        
-        # Keep only last 100 events
-        if len(self.short_term) > 100:
-            self.short_term = self.short_term[-100:]
+        with self._lock:
+            self.short_term.append(event)
+            
+            # Keep only last 100 events
+            if len(self.short_term) > 100:
+                self.short_term = self.short_term[-100:]
     
     def store_long_term(self, key: str, value: Any):
         """Store information in long-term memory."""
@@ -70,17 +74,20 @@ class BaseAgent(ABC):
         self.name = name
         self.description = description
         self.tools: Dict[str, Tool] = {}
+        # Tool names, rebuilt only when a tool is registered
+        self._available_tools: Tuple[str, ...] = ()
         self.memory = AgentMemory()
         self.is_active = False
         
     def register_tool(self, tool: Tool):
         """Register a tool that this agent can use."""
         self.tools[tool.name] = tool
+        self._available_tools = tuple(self.tools)
         logger.info(f"Agent {self.name} registered tool: {tool.name}")
     
-    def get_available_tools(self) -> List[str]:
-        """Get list of available tool names."""
-        return list(self.tools.keys())
+    def get_available_tools(self) -> Tuple[str, ...]:
+        """Get the available tool names."""
+        return self._available_tools
     
     def use_tool(self, tool_name: str, **kwargs) -> ToolResult:
         """Execute a tool with given parameters."""
@@ -6,6 +6,7 @@ email management workflow. It shows how to build complex multi-agent systems.
 """
 
 import logging
+import threading
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -15,6 +16,7 @@ from .email_classifier import EmailClassifier
 from .email_responder import EmailResponder  
 from .inbox_organizer import InboxOrganizer
 from ..tools.email_tools import EmailMessage, email_tools
+from ..tools.imap_pool import get_imap_pool
 from ..memory.persistent_memory import memory
 
 logger = logging.getLogger(__name__)
@@ -32,14 +34,14 @@ class EmailMasterAgent(BaseAgent):
     5. Performance monitoring
     """
     
-    def __init__(self):
+    def __init__(self, classifier: Optional[EmailClassifier] = None):
         super().__init__(
             name="EmailMasterAgent",
             description="Orchestrates comprehensive email management using specialized sub-agents"
         )
         
-        # Initialize sub-agents
-        self.classifier = EmailClassifier()
+        # Initialize sub-agents; an already built classifier can be shared
+        self.classifier = classifier or EmailClassifier()
         self.responder = EmailResponder()
         self.organizer = InboxOrganizer()
         
@@ -61,6 +63,9 @@ class EmailMasterAgent(BaseAgent):
             "organization_actions": 0,
             "user_feedback_received": 0
         }
+        # Workflow actions and their sub-agent runs may update metrics
+        # from several threads at once
+        self._metrics_lock = threading.Lock()
         
         # Register coordination tools
         self._register_coordination_tools()
@@ -68,7 +73,7 @@ class EmailMasterAgent(BaseAgent):
     def _register_coordination_tools(self):
         """Register tools for agent coordination and workflow management."""
         
-        def run_email_analysis_pipeline(emails: List[EmailMessage]) -> Dict[str, Any]:
+        def run_email_analysis_pipeline(emails: List[EmailMessage], batch: bool = False) -> Dict[str, Any]:
             """Run comprehensive analysis pipeline on emails."""
             results = {
                 "total_emails": len(emails),
@@ -92,7 +97,7 @@ class EmailMasterAgent(BaseAgent):
                     
                     # Submit response generation for emails needing responses
                     response_future = executor.submit(
-                        self._run_response_generation, emails
+                        self._run_response_generation, emails, batch
                     )
                     
                     # Collect results
@@ -111,7 +116,7 @@ class EmailMasterAgent(BaseAgent):
                 # Sequential processing
                 results["classification_results"] = self._run_classification_batch(emails)
                 results["organization_suggestions"] = self._run_organization_analysis(emails)
-                results["response_candidates"] = self._run_response_generation(emails)
+                results["response_candidates"] = self._run_response_generation(emails, batch)
             
             return results
         
@@ -252,6 +257,11 @@ class EmailMasterAgent(BaseAgent):
             function=monitor_agent_performance
         ))
     
+    def _record_metric(self, name: str, amount: int):
+        """Add to a performance counter under the metrics lock."""
+        with self._metrics_lock:
+            self.performance_metrics[name] += amount
+    
     def _run_classification_batch(self, emails: List[EmailMessage]) -> List[Dict[str, Any]]:
         """Run classification on a batch of emails."""
         # Prepare emails for classifier
@@ -274,14 +284,14 @@ class EmailMasterAgent(BaseAgent):
                     "confidence": 0.8  # Would calculate based on multiple factors
                 })
         
-        self.performance_metrics["classifications_made"] += len(classifications)
+        self._record_metric("classifications_made", len(classifications))
         return {"classifications": classifications}
     
     def _run_organization_analysis(self, emails: List[EmailMessage]) -> List[Dict[str, Any]]:
         """Run organization analysis on emails."""
-        # Prepare emails for organizer
+        # Hand the live messages to the organizer
         perception = {
-            "emails_for_organization": [email.to_dict() for email in emails],
+            "emails": emails,
             "total_emails": len(emails)
         }
         
@@ -304,11 +314,14 @@ class EmailMasterAgent(BaseAgent):
                                 "confidence": 0.7
                             })
         
-        self.performance_metrics["organization_actions"] += len(suggestions)
+        self._record_metric("organization_actions", len(suggestions))
         return {"organization": suggestions}
     
-    def _run_response_generation(self, emails: List[EmailMessage]) -> List[Dict[str, Any]]:
-        """Run response generation for emails that need responses."""
+    def _run_response_generation(self, emails: List[EmailMessage], batch: bool = False) -> List[Dict[str, Any]]:
+        """
+        Run response generation for emails that need responses. With batch
+        set, drafts go through one OpenAI Batch API job.
+        """
         # Filter emails that likely need responses
         response_candidates = []
         for email in emails:
@@ -326,7 +339,7 @@ class EmailMasterAgent(BaseAgent):
         
         # Run responder
         actions = self.responder.think(perception)
-        results = self.responder.act(actions)
+        results = self.responder.act_batch(actions) if batch else self.responder.act(actions)
         
         # Extract response candidates
         responses = []
@@ -340,7 +353,7 @@ class EmailMasterAgent(BaseAgent):
                     "confidence": 0.6  # Would calculate based on response quality
                 })
         
-        self.performance_metrics["responses_generated"] += len(responses)
+        self._record_metric("responses_generated", len(responses))
         return {"responses": responses}
     
     def _execute_single_action(self, action: Dict[str, Any]) -> bool:
@@ -376,10 +389,10 @@ class EmailMasterAgent(BaseAgent):
     def _estimate_classifier_accuracy(self) -> float:
         """Estimate classifier accuracy based on user feedback."""
         # This would analyze feedback patterns in memory
-        feedback_events = memory.search_events(
+        feedback_events = list(memory.search_events(
             event_type="user_feedback",
             limit=100
-        )
+        ))
         
         if not feedback_events:
             return 0.85  # Default estimate
@@ -402,10 +415,10 @@ class EmailMasterAgent(BaseAgent):
     def _calculate_response_approval_rate(self) -> float:
         """Calculate rate of response approvals."""
         # This would analyze response approval patterns
-        approval_events = memory.search_events(
+        approval_events = list(memory.search_events(
             event_type="response_approval",
             limit=100
-        )
+        ))
         
         if not approval_events:
             return 0.0
@@ -501,71 +514,98 @@ class EmailMasterAgent(BaseAgent):
         """
         Master agent action: Execute comprehensive email management workflow.
         """
-        results = []
-        
-        for action in actions:
-            if action["type"] == "comprehensive_email_processing":
-                emails = action["emails"]
-                
-                workflow_result = {
-                    "workflow_type": "comprehensive_email_processing",
-                    "emails_processed": len(emails),
-                    "start_time": datetime.now().isoformat()
-                }
-                
-                # Execute workflow steps
-                pipeline_results = None
-                execution_plan = None
-                
-                for step in action["steps"]:
-                    if step == "run_analysis_pipeline":
-                        tool_result = self.use_tool(step, emails=emails)
-                        if tool_result.success:
-                            pipeline_results = tool_result.result
-                            workflow_result["analysis_results"] = pipeline_results
-                    
-                    elif step == "coordinate_workflow" and pipeline_results:
-                        tool_result = self.use_tool(step, analysis_results=pipeline_results)
-                        if tool_result.success:
-                            execution_plan = tool_result.result
-                            workflow_result["execution_plan"] = execution_plan
-                    
-                    elif step == "execute_actions" and execution_plan:
-                        tool_result = self.use_tool(step, execution_plan=execution_plan)
-                        if tool_result.success:
-                            workflow_result["execution_results"] = tool_result.result
-                    
-                    elif step == "monitor_performance":
-                        tool_result = self.use_tool(step)
-                        if tool_result.success:
-                            workflow_result["performance_report"] = tool_result.result
-                
-                workflow_result["end_time"] = datetime.now().isoformat()
-                
-                # Record workflow execution in memory
-                memory.add_event(
-                    event_type="workflow_execution",
-                    data=workflow_result,
-                    importance=0.8,
-                    tags=["workflow", "email_processing"]
-                )
-                
-                # Update performance metrics
-                self.performance_metrics["emails_processed"] += len(emails)
-                
-                results.append(ToolResult(
-                    success=True,
-                    result=workflow_result,
-                    metadata={"agent": self.name, "workflow": "comprehensive"}
-                ))
+        results = [self.execute_action(action) for action in actions]
         
         logger.info(f"Completed {len(results)} workflow executions")
         return results
     
+    def run_batch_cycle(self, perception: Dict[str, Any],
+                        actions: Optional[List[Dict[str, Any]]] = None) -> List[ToolResult]:
+        """
+        Execute a workflow for already-perceived emails, drafting responses
+        through the OpenAI Batch API. Meant for scheduled, non-interactive
+        runs where latency does not matter. Pass actions to reuse an
+        existing plan; otherwise one is made from the perception.
+        """
+        if actions is None:
+            actions = self.think(perception)
+        for action in actions:
+            action["batch"] = True
+        
+        return self.act(actions)
+    
+    def execute_action(self, action: Dict[str, Any]) -> ToolResult:
+        """
+        Execute exactly one planned workflow action.
+        
+        Public so callers can schedule independent actions themselves,
+        e.g. on a thread pool.
+        """
+        if action["type"] != "comprehensive_email_processing":
+            return ToolResult(
+                success=False,
+                result=None,
+                error=f"Unknown workflow action: {action['type']}"
+            )
+        
+        emails = action["emails"]
+        
+        workflow_result = {
+            "workflow_type": "comprehensive_email_processing",
+            "emails_processed": len(emails),
+            "start_time": datetime.now().isoformat()
+        }
+        
+        # Execute workflow steps
+        pipeline_results = None
+        execution_plan = None
+        
+        for step in action["steps"]:
+            if step == "run_analysis_pipeline":
+                tool_result = self.use_tool(step, emails=emails, batch=action.get("batch", False))
+                if tool_result.success:
+                    pipeline_results = tool_result.result
+                    workflow_result["analysis_results"] = pipeline_results
+            
+            elif step == "coordinate_workflow" and pipeline_results:
+                tool_result = self.use_tool(step, analysis_results=pipeline_results)
+                if tool_result.success:
+                    execution_plan = tool_result.result
+                    workflow_result["execution_plan"] = execution_plan
+            
+            elif step == "execute_actions" and execution_plan:
+                tool_result = self.use_tool(step, execution_plan=execution_plan)
+                if tool_result.success:
+                    workflow_result["execution_results"] = tool_result.result
+            
+            elif step == "monitor_performance":
+                tool_result = self.use_tool(step)
+                if tool_result.success:
+                    workflow_result["performance_report"] = tool_result.result
+        
+        workflow_result["end_time"] = datetime.now().isoformat()
+        
+        # Record workflow execution in memory
+        memory.add_event(
+            event_type="workflow_execution",
+            data=workflow_result,
+            importance=0.8,
+            tags=["workflow", "email_processing"]
+        )
+        
+        # Update performance metrics
+        self._record_metric("emails_processed", len(emails))
+        
+        return ToolResult(
+            success=True,
+            result=workflow_result,
+            metadata={"agent": self.name, "workflow": "comprehensive"}
+        )
+    
     def _assess_system_health(self) -> Dict[str, str]:
         """Assess overall system health."""
         return {
-            "email_connection": "healthy" if email_tools.connection else "disconnected",
+            "email_connection": get_imap_pool().state,
             "memory_system": "healthy",
             "sub_agents": "operational",
             "overall_status": "healthy"
@@ -576,7 +616,7 @@ class EmailMasterAgent(BaseAgent):
         """Process user feedback for learning and improvement."""
         try:
             memory.add_user_feedback(email_id, feedback_type, feedback_data)
-            self.performance_metrics["user_feedback_received"] += 1
+            self._record_metric("user_feedback_received", 1)
             
             logger.info(f"Processed user feedback: {feedback_type} for email {email_id}")
             return True
@@ -585,15 +625,23 @@ class EmailMasterAgent(BaseAgent):
             return False
     
     def get_comprehensive_status(self) -> Dict[str, Any]:
-        """Get comprehensive status of the entire email agent system."""
+        """
+        Get comprehensive status of the entire email agent system.
+        
+        The performance metrics are a copy taken under the metrics lock,
+        not the live dict that worker threads update.
+        """
+        with self._metrics_lock:
+            metrics = dict(self.performance_metrics)
+        
         return {
             "master_agent": self.get_status(),
             "sub_agents": {
                 "classifier": self.classifier.get_status(),
-                "responder": self.responder.get_status(), 
+                "responder": self.responder.get_status(),
                 "organizer": self.organizer.get_status()
             },
-            "performance_metrics": self.performance_metrics,
+            "performance_metrics": metrics,
             "workflow_settings": self.workflow_settings,
             "memory_summary": memory.get_learning_summary(),
             "system_health": self._assess_system_health()
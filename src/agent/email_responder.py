@@ -7,7 +7,8 @@ It shows how agents can use LLMs for complex reasoning and content generation.
 
 import logging
 import json
-from typing import Dict, List, Any, Optional
+import time
+from typing import Dict, List, Any, Optional, Final, Tuple
 from datetime import datetime
 
 try:
@@ -19,10 +20,85 @@ except ImportError:
 
 from .base import BaseAgent, Tool, ToolResult
 from ..tools.email_tools import EmailMessage, email_tools
-from ..config.settings import settings
+from ..config.settings import get_settings
 
 logger = logging.getLogger(__name__)
 
+# Kept byte-for-byte stable (and first in every request) so the provider's
+# automatic prompt caching can reuse the prefix across calls
+_SYSTEM_PROMPT: Final[str] = (
+    "You are an AI assistant helping to draft professional email responses. "
+    "Generate a helpful, polite, and contextually appropriate response to the given email. "
+    "Keep responses concise but warm. Match the tone of the original email. "
+    "Do not make commitments or promises without user approval."
+)
+
+_USER_PROMPT_HEADER: Final[str] = (
+    "Draft a professional response to the email below, taking the detected "
+    "intent into account.\n\n---\n"
+)
+
+# Template replies used when no LLM client is configured or the call fails
+_DEFAULT_FALLBACK_RESPONSE: Final[str] = (
+    "Thank you for your email. I've received your message and will respond appropriately soon."
+)
+
+_FALLBACK_RESPONSES: Final[Dict[str, str]] = {
+    "meeting_request": "Thank you for the meeting invitation. I'll check my calendar and get back to you with my availability.",
+    "information_request": "Thank you for your inquiry. I'll gather the requested information and send it to you shortly.",
+    "task_assignment": "Thank you for your email. I've noted the request and will work on this. I'll update you on my progress.",
+    "confirmation": "Thank you for reaching out. I'll review the details and confirm shortly.",
+    "thank_you": "You're very welcome! I'm glad I could help. Please don't hesitate to reach out if you need anything else."
+}
+
+# Keywords that signal each intent, matched against lowercased email text
+_INTENT_KEYWORDS: Final[Dict[str, Tuple[str, ...]]] = {
+    "meeting_request": ("meeting", "call", "schedule", "appointment", "available"),
+    "information_request": ("please send", "can you provide", "need information", "details about"),
+    "task_assignment": ("please", "can you", "need you to", "action required"),
+    "confirmation": ("confirm", "verify", "check", "is this correct"),
+    "complaint": ("problem", "issue", "unhappy", "disappointed", "wrong"),
+    "thank_you": ("thank you", "thanks", "appreciate", "grateful"),
+    "introduction": ("introduce", "meet", "new to", "joining")
+}
+
+# Sender address parts and subject words that make a reply urgent
+_URGENT_SENDERS: Final[Tuple[str, ...]] = ("boss@", "client@", "emergency@")
+_URGENT_SUBJECT_WORDS: Final[Tuple[str, ...]] = ("urgent", "asap", "emergency", "immediate")
+
+# OpenAI Batch API polling; jobs still running after the configured
+# batch_wait_seconds are cancelled
+_BATCH_POLL_SECONDS: Final[int] = 30
+_BATCH_FINAL_STATUSES: Final[Tuple[str, ...]] = ("completed", "failed", "expired", "cancelled")
+
+# Follow-up actions suggested per intent; intents not listed get none
+_SUGGESTED_ACTIONS: Final[Dict[str, Tuple[str, ...]]] = {
+    "meeting_request": (
+        "Check calendar for availability",
+        "Propose alternative times",
+        "Ask for meeting agenda",
+        "Confirm meeting platform (Zoom, Teams, etc.)"
+    ),
+    "information_request": (
+        "Gather requested information",
+        "Check if information is publicly available",
+        "Ask clarifying questions if needed",
+        "Set follow-up reminder"
+    ),
+    "task_assignment": (
+        "Clarify task requirements",
+        "Estimate time needed",
+        "Check resource availability",
+        "Set deadline expectations"
+    ),
+    "complaint": (
+        "Acknowledge the concern",
+        "Investigate the issue",
+        "Offer solution or compensation",
+        "Follow up to ensure resolution"
+    )
+}
+
 
 class EmailResponder(BaseAgent):
     """
@@ -43,8 +119,9 @@ class EmailResponder(BaseAgent):
         
         # Initialize LLM client
         self.llm_client = None
-        if OPENAI_AVAILABLE and settings.openai_api_key:
-            self.llm_client = OpenAI(api_key=settings.openai_api_key)
+        api_key = get_settings().openai_api_key
+        if OPENAI_AVAILABLE and api_key:
+            self.llm_client = OpenAI(api_key=api_key)
         
         # Response templates for common scenarios
         self.response_templates = {
@@ -78,35 +155,7 @@ class EmailResponder(BaseAgent):
         
         def analyze_email_intent(email: EmailMessage) -> Dict[str, Any]:
             """Analyze what the email is asking for."""
-            text = f"{email.subject} {email.body}".lower()
-            
-            intents = {
-                "meeting_request": ["meeting", "call", "schedule", "appointment", "available"],
-                "information_request": ["please send", "can you provide", "need information", "details about"],
-                "task_assignment": ["please", "can you", "need you to", "action required"],
-                "confirmation": ["confirm", "verify", "check", "is this correct"],
-                "complaint": ["problem", "issue", "unhappy", "disappointed", "wrong"],
-                "thank_you": ["thank you", "thanks", "appreciate", "grateful"],
-                "introduction": ["introduce", "meet", "new to", "joining"]
-            }
-            
-            detected_intents = []
-            confidence_scores = {}
-            
-            for intent, keywords in intents.items():
-                score = sum(1 for keyword in keywords if keyword in text)
-                if score > 0:
-                    detected_intents.append(intent)
-                    confidence_scores[intent] = score / len(keywords)
-            
-            primary_intent = max(confidence_scores, key=confidence_scores.get) if confidence_scores else "general"
-            
-            return {
-                "primary_intent": primary_intent,
-                "all_intents": detected_intents,
-                "confidence_scores": confidence_scores,
-                "requires_response": len(detected_intents) > 0
-            }
+            return self._score_intents(f"{email.subject} {email.body}".lower(), email.id)
         
         def generate_ai_response(email: EmailMessage, intent_analysis: Dict) -> str:
             """Generate AI-powered response using LLM."""
@@ -114,30 +163,8 @@ class EmailResponder(BaseAgent):
                 return self._generate_template_response(email, intent_analysis)
             
             try:
-                system_prompt = """You are an AI assistant helping to draft professional email responses. 
-                Generate a helpful, polite, and contextually appropriate response to the given email.
-                Keep responses concise but warm. Match the tone of the original email.
-                Do not make commitments or promises without user approval."""
-                
-                user_prompt = f"""
-                Original Email:
-                From: {email.sender}
-                Subject: {email.subject}
-                Body: {email.body[:1000]}  # Limit for API
-                
-                Intent Analysis: {intent_analysis['primary_intent']}
-                
-                Please draft a professional response.
-                """
-                
                 response = self.llm_client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": system_prompt},
-                        {"role": "user", "content": user_prompt}
-                    ],
-                    max_tokens=300,
-                    temperature=0.7
+                    **self._chat_request_body(email, intent_analysis)
                 )
                 
                 return response.choices[0].message.content.strip()
@@ -146,78 +173,17 @@ class EmailResponder(BaseAgent):
                 logger.error(f"AI response generation failed: {e}")
                 return self._generate_template_response(email, intent_analysis)
         
-        def _generate_template_response(self, email: EmailMessage, intent_analysis: Dict) -> str:
-            """Fallback template-based response generation."""
-            intent = intent_analysis.get("primary_intent", "general")
-            
-            if intent == "meeting_request":
-                return "Thank you for the meeting invitation. I'll check my calendar and get back to you with my availability."
-            elif intent == "information_request":
-                return "Thank you for your inquiry. I'll gather the requested information and send it to you shortly."
-            elif intent == "task_assignment":
-                return "Thank you for your email. I've noted the request and will work on this. I'll update you on my progress."
-            elif intent == "confirmation":
-                return "Thank you for reaching out. I'll review the details and confirm shortly."
-            elif intent == "thank_you":
-                return "You're very welcome! I'm glad I could help. Please don't hesitate to reach out if you need anything else."
-            else:
-                return "Thank you for your email. I've received your message and will respond appropriately soon."
-        
-        def suggest_response_actions(email: EmailMessage, intent_analysis: Dict) -> List[str]:
+        def suggest_response_actions(email: EmailMessage, intent_analysis: Dict) -> Tuple[str, ...]:
             """Suggest possible actions based on email content."""
-            intent = intent_analysis.get("primary_intent", "general")
-            actions = []
-            
-            if intent == "meeting_request":
-                actions.extend([
-                    "Check calendar for availability",
-                    "Propose alternative times",
-                    "Ask for meeting agenda",
-                    "Confirm meeting platform (Zoom, Teams, etc.)"
-                ])
-            elif intent == "information_request":
-                actions.extend([
-                    "Gather requested information",
-                    "Check if information is publicly available",
-                    "Ask clarifying questions if needed",
-                    "Set follow-up reminder"
-                ])
-            elif intent == "task_assignment":
-                actions.extend([
-                    "Clarify task requirements",
-                    "Estimate time needed",
-                    "Check resource availability",
-                    "Set deadline expectations"
-                ])
-            elif intent == "complaint":
-                actions.extend([
-                    "Acknowledge the concern",
-                    "Investigate the issue",
-                    "Offer solution or compensation",
-                    "Follow up to ensure resolution"
-                ])
-            
-            return actions
+            return self._actions_for(intent_analysis.get("primary_intent", "general"))
         
         def determine_response_priority(email: EmailMessage, intent_analysis: Dict) -> str:
             """Determine how quickly this email should be responded to."""
-            # Check for urgency indicators
-            urgent_senders = ["boss@", "client@", "emergency@"]
-            urgent_subjects = ["urgent", "asap", "emergency", "immediate"]
-            
-            if any(sender in email.sender.lower() for sender in urgent_senders):
-                return "immediate"
-            
-            if any(word in email.subject.lower() for word in urgent_subjects):
-                return "high"
-            
-            intent = intent_analysis.get("primary_intent", "general")
-            if intent in ["meeting_request", "task_assignment", "complaint"]:
-                return "medium"
-            elif intent in ["information_request", "confirmation"]:
-                return "low"
-            else:
-                return "normal"
+            return self._priority_for(
+                email.sender.lower(),
+                email.subject.lower(),
+                intent_analysis.get("primary_intent", "general")
+            )
         
         # Register all tools
         self.register_tool(Tool(
@@ -244,6 +210,174 @@ class EmailResponder(BaseAgent):
             function=determine_response_priority
         ))
     
+    def _score_intents(self, text: str, email_id: str) -> Dict[str, Any]:
+        """Score intent keywords against already-lowercased email text."""
+        # Only the primary intent is consumed downstream; keep the detailed
+        # breakdown for debug logging
+        verbose = logger.isEnabledFor(logging.DEBUG)
+        detected_intents = []
+        confidence_scores = {}
+        best_intent, best_score = None, -1.0
+        
+        for intent, keywords in _INTENT_KEYWORDS.items():
+            score = sum(1 for keyword in keywords if keyword in text)
+            if score > 0:
+                confidence = score / len(keywords)
+                if verbose:
+                    detected_intents.append(intent)
+                    confidence_scores[intent] = confidence
+                
+                # Track the strongest intent while scoring (first wins on ties)
+                if confidence > best_score:
+                    best_intent, best_score = intent, confidence
+        
+        if verbose:
+            logger.debug(f"Intent scores for email {email_id}: {confidence_scores}")
+        
+        return {
+            "primary_intent": best_intent or "general",
+            "all_intents": tuple(detected_intents),
+            "confidence_scores": confidence_scores,
+            "requires_response": best_intent is not None
+        }
+    
+    def _priority_for(self, sender_lower: str, subject_lower: str, intent: str) -> str:
+        """Map sender, subject and intent to a response priority level."""
+        # Check for urgency indicators
+        if any(sender in sender_lower for sender in _URGENT_SENDERS):
+            return "immediate"
+        
+        if any(word in subject_lower for word in _URGENT_SUBJECT_WORDS):
+            return "high"
+        
+        if intent in ["meeting_request", "task_assignment", "complaint"]:
+            return "medium"
+        elif intent in ["information_request", "confirmation"]:
+            return "low"
+        else:
+            return "normal"
+    
+    def _actions_for(self, intent: str) -> Tuple[str, ...]:
+        """Suggest follow-up actions for a detected intent."""
+        return _SUGGESTED_ACTIONS.get(intent, ())
+    
+    def _chat_request_body(self, email: EmailMessage, intent_analysis: Dict) -> Dict[str, Any]:
+        """Chat completion parameters for drafting a reply to one email."""
+        # Invariant instructions first, per-email content last
+        user_prompt = (
+            f"{_USER_PROMPT_HEADER}"
+            f"Intent Analysis: {intent_analysis['primary_intent']}\n"
+            f"From: {email.sender}\n"
+            f"Subject: {email.subject}\n"
+            f"Body: {email.body[:1000]}"  # Limit for API
+        )
+        
+        return {
+            "model": "gpt-3.5-turbo",
+            "messages": [
+                {"role": "system", "content": _SYSTEM_PROMPT},
+                {"role": "user", "content": user_prompt}
+            ],
+            "max_tokens": 300,
+            "temperature": 0.7
+        }
+    
+    def _generate_batch_responses(self, items: List[Tuple[EmailMessage, Dict]]) -> Dict[str, str]:
+        """
+        Draft replies for many emails through one OpenAI Batch API job.
+        
+        Batch jobs are billed at a discount but may take up to the
+        completion window to finish. The caller waits at most the
+        batch_wait_seconds setting; a job still running then is cancelled.
+        Returns drafts keyed by email id; emails whose request failed (or
+        did not finish in time) are left out so callers can fall back to
+        templates.
+        """
+        if not self.llm_client or not items:
+            return {}
+        
+        lines = [
+            json.dumps({
+                "custom_id": email.id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._chat_request_body(email, intent_analysis)
+            })
+            for email, intent_analysis in items
+        ]
+        
+        try:
+            batch_file = self.llm_client.files.create(
+                file=("responses.jsonl", "\n".join(lines).encode("utf-8")),
+                purpose="batch"
+            )
+            batch = self.llm_client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint="/v1/chat/completions",
+                completion_window="24h"
+            )
+            logger.info(f"Submitted batch {batch.id} with {len(lines)} response requests")
+            
+            deadline = time.monotonic() + get_settings().batch_wait_seconds
+            while batch.status not in _BATCH_FINAL_STATUSES:
+                if time.monotonic() > deadline:
+                    logger.error(f"Batch {batch.id} did not finish in time; cancelling it")
+                    self.llm_client.batches.cancel(batch.id)
+                    return {}
+                time.sleep(_BATCH_POLL_SECONDS)
+                batch = self.llm_client.batches.retrieve(batch.id)
+            
+            if batch.status != "completed" or not batch.output_file_id:
+                logger.error(f"Batch {batch.id} ended with status {batch.status}")
+                return {}
+            
+            output = self.llm_client.files.content(batch.output_file_id).text
+            
+        except Exception as e:
+            logger.error(f"Batch response generation failed: {e}")
+            return {}
+        
+        drafts = {}
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            # One malformed line loses only its own draft
+            try:
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if response.get("status_code") != 200:
+                    continue
+                choices = response.get("body", {}).get("choices", [])
+                if choices:
+                    drafts[record["custom_id"]] = choices[0]["message"]["content"].strip()
+            except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                logger.warning(f"Skipping unreadable batch output line: {e}")
+        
+        return drafts
+    
+    def _generate_template_response(self, email: EmailMessage, intent_analysis: Dict) -> str:
+        """Fallback template-based response generation."""
+        intent = intent_analysis.get("primary_intent", "general")
+        return _FALLBACK_RESPONSES.get(intent, _DEFAULT_FALLBACK_RESPONSE)
+    
+    def _analyze_email(self, email: EmailMessage) -> Dict[str, Any]:
+        """
+        Fused analysis used by act(): lowercase the email once and derive
+        intent, priority and suggested actions from that single pass instead
+        of dispatching three tools over the same subject and body.
+        """
+        subject_lower = email.subject.lower()
+        text = f"{subject_lower} {email.body.lower()}"
+        
+        intent_analysis = self._score_intents(text, email.id)
+        intent = intent_analysis["primary_intent"]
+        
+        return {
+            "intent_analysis": intent_analysis,
+            "determine_priority": self._priority_for(email.sender.lower(), subject_lower, intent),
+            "suggest_actions": self._actions_for(intent)
+        }
+    
     def perceive(self) -> Dict[str, Any]:
         """
         Perception: Identify emails that need responses.
@@ -253,10 +387,11 @@ class EmailResponder(BaseAgent):
         emails = email_tools.fetch_recent_emails(limit=5)
         
         # Filter for emails that likely need responses
+        own_address = get_settings().email_address.lower()
         response_needed = []
         for email in emails:
             # Simple heuristic: not from ourselves and contains question words
-            if settings.email_address.lower() not in email.sender.lower():
+            if own_address not in email.sender.lower():
                 text = f"{email.subject} {email.body}".lower()
                 if any(word in text for word in ["?", "please", "can you", "need", "request"]):
                     response_needed.append(email)
@@ -318,46 +453,75 @@ class EmailResponder(BaseAgent):
         for action in actions:
             if action["type"] == "generate_email_response":
                 email = action["email"]
-                email_id = action["email_id"]
                 
-                response_package = {
-                    "email_id": email_id,
-                    "original_subject": email.subject,
-                    "original_sender": email.sender,
-                    "response_generated_at": datetime.now().isoformat()
-                }
-                
-                # Execute response generation pipeline
-                intent_result = None
-                for step in action["steps"]:
-                    if step == "analyze_intent":
-                        tool_result = self.use_tool(step, email=email)
-                        if tool_result.success:
-                            intent_result = tool_result.result
-                            response_package["intent_analysis"] = intent_result
-                    
-                    elif step == "generate_response" and intent_result:
-                        tool_result = self.use_tool(step, email=email, intent_analysis=intent_result)
-                        if tool_result.success:
-                            response_package["suggested_response"] = tool_result.result
-                    
-                    else:
-                        tool_result = self.use_tool(step, email=email)
-                        if tool_result.success:
-                            response_package[step] = tool_result.result
+                # Intent, priority and actions come from one fused pass;
+                # only the (potentially remote) generation step is a tool call
+                response_package = self._start_response_package(email)
                 
-                # Store response package in memory
-                self.memory.store_long_term(f"response_package_{email_id}", response_package)
+                if "generate_response" in action["steps"]:
+                    tool_result = self.use_tool(
+                        "generate_response",
+                        email=email,
+                        intent_analysis=response_package["intent_analysis"]
+                    )
+                    if tool_result.success:
+                        response_package["suggested_response"] = tool_result.result
                 
-                results.append(ToolResult(
-                    success=True,
-                    result=response_package,
-                    metadata={"email_id": email_id, "agent": self.name}
-                ))
+                results.append(self._finish_response_package(response_package))
         
         logger.info(f"Generated responses for {len(results)} emails")
         return results
     
+    def act_batch(self, actions: List[Dict[str, Any]]) -> List[ToolResult]:
+        """
+        Like act(), but drafts every reply through a single OpenAI Batch API
+        job instead of one chat completion per email. Falls back to template
+        replies when no LLM client is configured or a request fails.
+        """
+        pending = [
+            (action["email"], self._start_response_package(action["email"]), action["steps"])
+            for action in actions
+            if action["type"] == "generate_email_response"
+        ]
+        
+        drafts = self._generate_batch_responses([
+            (email, response_package["intent_analysis"])
+            for email, response_package, steps in pending
+            if "generate_response" in steps
+        ])
+        
+        results = []
+        for email, response_package, steps in pending:
+            if "generate_response" in steps:
+                response_package["suggested_response"] = drafts.get(email.id) or \
+                    self._generate_template_response(email, response_package["intent_analysis"])
+            results.append(self._finish_response_package(response_package))
+        
+        logger.info(f"Generated batched responses for {len(results)} emails")
+        return results
+    
+    def _start_response_package(self, email: EmailMessage) -> Dict[str, Any]:
+        """Response package for one email, with its fused analysis filled in."""
+        response_package = {
+            "email_id": email.id,
+            "original_subject": email.subject,
+            "original_sender": email.sender,
+            "response_generated_at": datetime.now().isoformat()
+        }
+        response_package.update(self._analyze_email(email))
+        return response_package
+    
+    def _finish_response_package(self, response_package: Dict[str, Any]) -> ToolResult:
+        """Store a completed response package in memory and wrap it as a result."""
+        email_id = response_package["email_id"]
+        self.memory.store_long_term(f"response_package_{email_id}", response_package)
+        
+        return ToolResult(
+            success=True,
+            result=response_package,
+            metadata={"email_id": email_id, "agent": self.name}
+        )
+    
     def send_response(self, email_id: str, approved: bool = False) -> bool:
         """Send a generated response if approved by user."""
         response_package = self.memory.long_term.get(f"response_package_{email_id}")
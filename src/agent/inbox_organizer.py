@@ -6,9 +6,13 @@ It shows how agents can perform repetitive tasks and maintain organizational sys
 """
 
 import logging
-from typing import Dict, List, Any, Tuple
+import os
+import re
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any, Iterable, Optional, Tuple
 from datetime import datetime, timedelta
-from collections import defaultdict
 
 from .base import BaseAgent, Tool, ToolResult
 from ..tools.email_tools import EmailMessage, email_tools
@@ -16,6 +20,23 @@ from ..tools.email_tools import EmailMessage, email_tools
 logger = logging.getLogger(__name__)
 
 
+def _health_counts(emails: List[EmailMessage], stale_cutoff: datetime) -> Tuple[int, int]:
+    """
+    Fused counting pass for the inbox health score.
+    
+    Returns (old_unread, unlabeled) from one loop over the emails, where an
+    email is old when its date is at or before ``stale_cutoff``.
+    """
+    old_unread = 0
+    unlabeled = 0
+    for email in emails:
+        if not email.is_read and email.date <= stale_cutoff:
+            old_unread += 1
+        if not email.labels:
+            unlabeled += 1
+    return old_unread, unlabeled
+
+
 class InboxOrganizer(BaseAgent):
     """
     Sub-agent that specializes in inbox organization and maintenance.
@@ -27,6 +48,34 @@ class InboxOrganizer(BaseAgent):
     4. Maintenance and cleanup tasks
     """
     
+    # Smart folder rules in evaluation order; the first matching folder wins
+    _FOLDER_RULES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+        ("Action Required", ("please", "action required", "need", "asap")),
+        ("Waiting For Response", ("following up", "any update", "status")),
+        ("Newsletters", ("newsletter", "unsubscribe", "digest")),
+        ("Receipts", ("receipt", "invoice", "payment", "order")),
+        ("Travel", ("flight", "hotel", "reservation", "booking")),
+        # Would be customized based on project names
+        ("Projects", ("project", "milestone", "deliverable"))
+    )
+    
+    # Content-based categories for archive rules, in precedence order
+    _CATEGORY_RULES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+        ("newsletter", ("newsletter", "unsubscribe")),
+        ("promotional", ("sale", "discount", "offer")),
+        ("work", ("project", "work", "meeting"))
+    )
+    
+    # Tools that accept the shared classification pass from think()
+    _PRECOMPUTED_TASKS = frozenset({"apply_labels", "create_folders", "find_archive_candidates"})
+    
+    # Subject words that flag an email for priority handling
+    _URGENT_SUBJECT_WORDS: Tuple[str, ...] = ("urgent", "important", "asap")
+    _URGENT_SUBJECT_PATTERN = re.compile("|".join(map(re.escape, _URGENT_SUBJECT_WORDS)))
+    
+    # Upper bound on memoized email categories (oldest evicted first)
+    _CATEGORY_CACHE_SIZE = 10000
+    
     def __init__(self):
         super().__init__(
             name="InboxOrganizer",
@@ -60,6 +109,12 @@ class InboxOrganizer(BaseAgent):
             ]
         }
         
+        # LRU of email categories keyed by (id, hash(subject, sender)) so a
+        # reused id with different content is classified again; tools may
+        # run concurrently, hence the lock
+        self._category_cache: "OrderedDict[Tuple[str, int], str]" = OrderedDict()
+        self._category_cache_lock = threading.Lock()
+        
         # Priority settings
         self.vip_senders = [
             "boss@company.com",
@@ -67,50 +122,70 @@ class InboxOrganizer(BaseAgent):
             "family@personal.com"
         ]
         
+        # Lowercased lookup sets for O(1) VIP checks; entries written as
+        # "@domain.com" mark a whole domain as VIP
+        self._vip_set = frozenset(
+            vip.lower() for vip in self.vip_senders if not vip.startswith("@")
+        )
+        self._vip_domain_set = frozenset(
+            vip[1:].lower() for vip in self.vip_senders if vip.startswith("@")
+        )
+        
         # Register organization tools
         self._register_organization_tools()
     
     def _register_organization_tools(self):
         """Register tools specific to inbox organization."""
         
-        def apply_auto_labels(emails: List[EmailMessage]) -> Dict[str, List[str]]:
+        def apply_auto_labels(emails: List[EmailMessage],
+                              precomputed: Optional[Dict[str, Any]] = None) -> Dict[str, List[str]]:
             """Automatically apply labels based on content."""
-            labeling_results = defaultdict(list)
+            batch = precomputed or self._classify_batch(emails)
+            labeling_results = batch["labels"]
             
-            for email in emails:
-                text = f"{email.subject} {email.body}".lower()
-                
-                for label, keywords in self.organization_rules["auto_labels"].items():
-                    if any(keyword in text for keyword in keywords):
-                        labeling_results[label].append(email.id)
-                        
-                        # Apply the label (simulated)
-                        email_tools.add_label(email.id, label)
-                        logger.info(f"Applied label '{label}' to email {email.id}")
+            # Apply each label to all of its emails in one batched call;
+            # the tool logs one summary line per label
+            for label, email_ids in labeling_results.items():
+                email_tools.add_labels_batch(label, email_ids)
             
-            return dict(labeling_results)
+            return {label: list(email_ids) for label, email_ids in labeling_results.items()}
         
-        def identify_archive_candidates(emails: List[EmailMessage]) -> List[Dict[str, Any]]:
+        def identify_archive_candidates(emails: List[EmailMessage],
+                                        precomputed: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
             """Identify emails that should be archived based on age and category."""
+            categories = precomputed["categories"] if precomputed else {}
             candidates = []
             now = datetime.now()
             
+            # Resolve every category's cutoff once instead of building a
+            # timedelta per email; unknown categories fall back to 30 days
+            archive_after = self.organization_rules["archive_after_days"]
+            cutoffs = {
+                category: now - timedelta(days=days)
+                for category, days in archive_after.items()
+            }
+            default_cutoff = now - timedelta(days=30)
+            
+            # Emails newer than the shortest threshold cannot be candidates
+            # in any category, so skip them before classifying
+            newest_cutoff = max(default_cutoff, *cutoffs.values())
+            
             for email in emails:
+                if email.date >= newest_cutoff:
+                    continue
+                
                 # Determine email category (would use classifier results)
-                category = self._guess_email_category(email)
+                category = categories.get(email.id) or self._guess_email_category(email)
                 
                 # Check if email is old enough to archive
-                archive_days = self.organization_rules["archive_after_days"].get(category, 30)
-                age_threshold = now - timedelta(days=archive_days)
-                
-                if email.date < age_threshold:
+                if email.date < cutoffs.get(category, default_cutoff):
                     candidates.append({
                         "email_id": email.id,
                         "subject": email.subject,
                         "sender": email.sender,
                         "category": category,
                         "age_days": (now - email.date).days,
-                        "threshold_days": archive_days
+                        "threshold_days": archive_after.get(category, 30)
                     })
             
             return candidates
@@ -120,12 +195,8 @@ class InboxOrganizer(BaseAgent):
             sender_groups = defaultdict(list)
             
             for email in emails:
-                # Clean sender email
-                sender = email.sender.lower().strip()
-                if "<" in sender and ">" in sender:
-                    sender = sender.split("<")[1].split(">")[0]
-                
-                sender_groups[sender].append({
+                # Group on the parsed address cached on the message
+                sender_groups[email.sender_addr].append({
                     "id": email.id,
                     "subject": email.subject,
                     "date": email.date.isoformat()
@@ -133,51 +204,25 @@ class InboxOrganizer(BaseAgent):
             
             return dict(sender_groups)
         
-        def create_smart_folders(emails: List[EmailMessage]) -> Dict[str, int]:
+        def create_smart_folders(emails: List[EmailMessage],
+                                 precomputed: Optional[Dict[str, Any]] = None) -> Dict[str, int]:
             """Create and populate smart folders based on email patterns."""
-            folder_assignments = defaultdict(int)
-            
-            for email in emails:
-                text = f"{email.subject} {email.body}".lower()
-                
-                # Action Required folder
-                if any(phrase in text for phrase in ["please", "action required", "need", "asap"]):
-                    folder_assignments["Action Required"] += 1
-                
-                # Waiting For Response folder
-                elif any(phrase in text for phrase in ["following up", "any update", "status"]):
-                    folder_assignments["Waiting For Response"] += 1
-                
-                # Newsletters folder
-                elif any(phrase in text for phrase in ["newsletter", "unsubscribe", "digest"]):
-                    folder_assignments["Newsletters"] += 1
-                
-                # Receipts folder
-                elif any(phrase in text for phrase in ["receipt", "invoice", "payment", "order"]):
-                    folder_assignments["Receipts"] += 1
-                
-                # Travel folder
-                elif any(phrase in text for phrase in ["flight", "hotel", "reservation", "booking"]):
-                    folder_assignments["Travel"] += 1
-                
-                # Projects folder (would be customized based on project names)
-                elif any(phrase in text for phrase in ["project", "milestone", "deliverable"]):
-                    folder_assignments["Projects"] += 1
-                
-                else:
-                    folder_assignments["General"] += 1
-            
-            return dict(folder_assignments)
+            batch = precomputed or self._classify_batch(emails)
+            return dict(batch["folders"])
         
         def prioritize_vip_emails(emails: List[EmailMessage]) -> List[Dict[str, Any]]:
             """Identify and prioritize emails from VIP senders."""
             vip_emails = []
+            urgent_search = self._URGENT_SUBJECT_PATTERN.search
             
             for email in emails:
-                sender_email = email.sender.lower()
+                sender_addr = email.sender_addr
                 
-                # Check if sender is in VIP list
-                is_vip = any(vip.lower() in sender_email for vip in self.vip_senders)
+                # Check if sender (or their domain) is in the VIP sets
+                is_vip = (
+                    sender_addr in self._vip_set
+                    or sender_addr.rpartition("@")[2] in self._vip_domain_set
+                )
                 
                 if is_vip:
                     vip_emails.append({
@@ -189,7 +234,7 @@ class InboxOrganizer(BaseAgent):
                     })
                 
                 # Also check for high-priority keywords
-                elif any(word in email.subject.lower() for word in ["urgent", "important", "asap"]):
+                elif urgent_search(email.subject_lower):
                     vip_emails.append({
                         "email_id": email.id,
                         "subject": email.subject,
@@ -202,23 +247,27 @@ class InboxOrganizer(BaseAgent):
         
         def clean_duplicate_emails(emails: List[EmailMessage]) -> List[str]:
             """Identify potential duplicate emails for cleanup."""
-            seen_combinations = {}
+            seen_signatures = set()
             duplicates = []
+            seen = seen_signatures.add
             
             for email in emails:
-                # Create signature based on subject, sender, and approximate content
-                signature = (
-                    email.subject.lower().strip(),
-                    email.sender.lower().strip(),
+                # Signature based on subject, sender, approximate content and
+                # day; only its hash is kept since the id is never read back
+                signature = hash((
+                    email.subject_lower.strip(),
+                    email.sender_lower.strip(),
                     len(email.body),  # Simple content similarity
-                    email.date.date()  # Same day
-                )
+                    email.date.toordinal()  # Same day
+                ))
                 
-                if signature in seen_combinations:
+                if signature in seen_signatures:
                     duplicates.append(email.id)
-                    logger.info(f"Potential duplicate found: {email.id}")
                 else:
-                    seen_combinations[signature] = email.id
+                    seen(signature)
+            
+            if duplicates:
+                logger.info(f"Found {len(duplicates)} potential duplicate emails")
             
             return duplicates
         
@@ -259,20 +308,94 @@ class InboxOrganizer(BaseAgent):
             function=clean_duplicate_emails
         ))
     
+    def _classify_email(self, email: EmailMessage) -> Tuple[List[str], str, str]:
+        """
+        Derive auto labels, smart folder and archive category for one email
+        from its lowercased text.
+        """
+        text = email.text_lower
+        
+        labels = [
+            label for label, keywords in self.organization_rules["auto_labels"].items()
+            if any(keyword in text for keyword in keywords)
+        ]
+        folder = next(
+            (name for name, phrases in self._FOLDER_RULES
+             if any(phrase in text for phrase in phrases)),
+            "General"
+        )
+        category = next(
+            (name for name, words in self._CATEGORY_RULES
+             if any(word in text for word in words)),
+            None
+        )
+        
+        if category is None:
+            if any(word in email.sender_lower for word in ["family", "friend"]):
+                category = "personal"
+            else:
+                category = "general"
+        
+        return labels, folder, category
+    
+    def _classify_batch(self, emails: List[EmailMessage]) -> Dict[str, Any]:
+        """
+        Fused classification pass shared by the labeling, folder and archive
+        tools, so each email's text is scanned once per batch.
+        """
+        labels = defaultdict(list)
+        folders = defaultdict(int)
+        categories = {}
+        # (cache key, category) per email, stored under one lock hold below
+        remembered = []
+        
+        # Bind the per-email lookups once for the hot loop
+        classify = self._classify_email
+        category_key = self._category_key
+        
+        for email in emails:
+            email_id = email.id
+            email_labels, folder, category = classify(email)
+            for label in email_labels:
+                labels[label].append(email_id)
+            folders[folder] += 1
+            categories[email_id] = category
+            remembered.append((category_key(email), category))
+        
+        self._remember_categories(remembered)
+        
+        return {
+            "labels": dict(labels),
+            "folders": dict(folders),
+            "categories": categories
+        }
+    
+    @staticmethod
+    def _category_key(email: EmailMessage) -> Tuple[str, int]:
+        return email.id, hash((email.subject, email.sender))
+    
+    def _remember_categories(self, entries: Iterable[Tuple[Tuple[str, int], str]]) -> None:
+        """Store (cache key, category) pairs in the bounded LRU cache."""
+        cache = self._category_cache
+        with self._category_cache_lock:
+            for key, category in entries:
+                cache[key] = category
+                cache.move_to_end(key)
+            while len(cache) > self._CATEGORY_CACHE_SIZE:
+                cache.popitem(last=False)
+    
     def _guess_email_category(self, email: EmailMessage) -> str:
         """Simple email categorization for organization rules."""
-        text = f"{email.subject} {email.body}".lower()
-        
-        if any(word in text for word in ["newsletter", "unsubscribe"]):
-            return "newsletter"
-        elif any(word in text for word in ["sale", "discount", "offer"]):
-            return "promotional"
-        elif any(word in text for word in ["project", "work", "meeting"]):
-            return "work"
-        elif any(word in email.sender.lower() for word in ["family", "friend"]):
-            return "personal"
-        else:
-            return "general"
+        key = self._category_key(email)
+        with self._category_cache_lock:
+            category = self._category_cache.get(key)
+            if category is not None:
+                self._category_cache.move_to_end(key)
+                return category
+        
+        category = self._classify_email(email)[2]
+        self._remember_categories(((key, category),))
+        return category
     
     def perceive(self) -> Dict[str, Any]:
         """
@@ -281,51 +404,44 @@ class InboxOrganizer(BaseAgent):
         # Get all emails for organization analysis
         emails = email_tools.fetch_recent_emails(limit=100)
         
+        # Read the clock once for the whole perception
+        now = datetime.now()
+        today_ord = now.toordinal()
+        
         # Basic inbox statistics
         total_emails = len(emails)
         unread_count = sum(1 for email in emails if not email.is_read)
-        today_count = sum(1 for email in emails if email.date.date() == datetime.now().date())
+        today_count = sum(1 for email in emails if email.date.toordinal() == today_ord)
         
         return {
             "total_emails": total_emails,
             "unread_count": unread_count,
             "emails_today": today_count,
-            "emails_for_organization": [email.to_dict() for email in emails],
-            "inbox_health_score": self._calculate_inbox_health(emails),
-            "timestamp": datetime.now().isoformat()
+            "emails": emails,
+            "inbox_health_score": self._calculate_inbox_health(emails, now),
+            "timestamp": now.isoformat()
         }
     
     def think(self, perception: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Reasoning: Plan organization strategy based on inbox analysis.
         """
-        emails_data = perception.get("emails_for_organization", [])
         total_emails = perception.get("total_emails", 0)
         
-        # Reconstruct EmailMessage objects
-        emails = []
-        for email_data in emails_data:
-            emails.append(EmailMessage(
-                id=email_data["id"],
-                subject=email_data["subject"],
-                sender=email_data["sender"],
-                recipients=email_data["recipients"],
-                body=email_data["body"],
-                html_body=email_data.get("html_body"),
-                date=datetime.fromisoformat(email_data["date"]),
-                labels=email_data.get("labels", []),
-                is_read=email_data.get("is_read", False),
-                is_important=email_data.get("is_important", False),
-                attachments=email_data.get("attachments", [])
-            ))
+        # Work on the live messages so their cached lowercase views are reused
+        emails = perception.get("emails", [])
         
         actions = []
         
         # Plan organization tasks based on inbox size and health
         if total_emails > 0:
+            # Classify once; labeling, folders and archiving share the result
+            precomputed = self._classify_batch(emails)
+            
             actions.append({
                 "type": "inbox_organization",
                 "emails": emails,
+                "precomputed": precomputed,
                 "tasks": [
                     "apply_labels",
                     "prioritize_vips",
@@ -339,6 +455,7 @@ class InboxOrganizer(BaseAgent):
                 actions.append({
                     "type": "inbox_maintenance",
                     "emails": emails,
+                    "precomputed": precomputed,
                     "tasks": [
                         "find_archive_candidates",
                         "clean_duplicates"
@@ -354,6 +471,11 @@ class InboxOrganizer(BaseAgent):
         """
         results = []
         
+        # One timestamp for every workflow in this act() call
+        now = datetime.now()
+        timestamp = now.isoformat()
+        key_suffix = now.strftime('%Y%m%d_%H%M%S')
+        
         for action in actions:
             emails = action["emails"]
             action_type = action["type"]
@@ -361,12 +483,26 @@ class InboxOrganizer(BaseAgent):
             organization_result = {
                 "action_type": action_type,
                 "emails_processed": len(emails),
-                "timestamp": datetime.now().isoformat()
+                "timestamp": timestamp
             }
             
-            # Execute each organization task
-            for task in action["tasks"]:
-                tool_result = self.use_tool(task, emails=emails)
+            # Execute the organization tasks concurrently; they only read
+            # the shared emails and each returns its own result
+            precomputed = action.get("precomputed")
+            tasks = action["tasks"]
+            with ThreadPoolExecutor(max_workers=max(1, min(len(tasks), os.cpu_count() or 1))) as executor:
+                futures = []
+                for task in tasks:
+                    if precomputed is not None and task in self._PRECOMPUTED_TASKS:
+                        futures.append(executor.submit(
+                            self.use_tool, task, emails=emails, precomputed=precomputed
+                        ))
+                    else:
+                        futures.append(executor.submit(self.use_tool, task, emails=emails))
+            
+            # Collect in task order so the report layout stays stable
+            for task, future in zip(tasks, futures):
+                tool_result = future.result()
                 if tool_result.success:
                     organization_result[task] = tool_result.result
                 else:
@@ -374,7 +510,7 @@ class InboxOrganizer(BaseAgent):
             
             # Store organization results
             self.memory.store_long_term(
-                f"organization_{action_type}_{datetime.now().strftime('%Y%m%d_%H%M%S')}", 
+                f"organization_{action_type}_{key_suffix}", 
                 organization_result
             )
             
@@ -387,25 +523,26 @@ class InboxOrganizer(BaseAgent):
         logger.info(f"Completed {len(results)} organization workflows")
         return results
     
-    def _calculate_inbox_health(self, emails: List[EmailMessage]) -> float:
+    def _calculate_inbox_health(self, emails: List[EmailMessage], now: datetime = None) -> float:
         """Calculate a health score for the inbox (0-100)."""
         if not emails:
             return 100.0
         
         score = 100.0
-        now = datetime.now()
+        now = now or datetime.now()
         
         # Penalize for too many emails
         if len(emails) > 100:
             score -= min(20, (len(emails) - 100) / 10)
         
+        # Count old unread (more than 7 whole days) and unlabeled emails
+        # in one pass
+        old_unread, unlabeled = _health_counts(emails, now - timedelta(days=8))
+        
         # Penalize for old unread emails
-        old_unread = sum(1 for email in emails 
-                        if not email.is_read and (now - email.date).days > 7)
         score -= min(30, old_unread * 2)
         
         # Penalize for lack of organization (no labels)
-        unlabeled = sum(1 for email in emails if not email.labels)
         score -= min(20, (unlabeled / len(emails)) * 20)
         
         return max(0, score)
@@ -9,31 +9,137 @@ import click
 import json
 import logging
 from datetime import datetime
-from typing import Dict, Any
-from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.prompt import Confirm, Prompt
-
-from .agent.email_master_agent import EmailMasterAgent
-from .agent.email_classifier import EmailClassifier
-from .agent.email_responder import EmailResponder
-from .agent.inbox_organizer import InboxOrganizer
-from .memory.persistent_memory import memory
-from .config.settings import settings
-
-# Setup rich console for beautiful output
-console = Console()
+from functools import lru_cache
+from typing import Dict, Any, Optional, Sequence
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+from . import logging_setup
+
+# Rich, the agents and the memory store are imported inside the commands
+# that use them, so `--help` and light commands start quickly.
 
 # Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.log_level),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+logging_setup.configure()
 
 logger = logging.getLogger(__name__)
 
+# Interactive prompt with its color baked in, so the REPL loop reads input
+# with plain input(); readline needs the escapes wrapped in \x01/\x02 to
+# measure the prompt width correctly
+_PROMPT_PLAIN = "email-agent> "
+_PROMPT_ANSI = "\x1b[36memail-agent>\x1b[0m "
+_PROMPT_READLINE = "\x01\x1b[36m\x02email-agent>\x01\x1b[0m\x02 "
+
+# Kinds of feedback the learning system accepts
+_FEEDBACK_TYPES = ('classification', 'response', 'organization', 'priority')
+
+# Command list shown by `help` in interactive mode
+_HELP_MARKUP = f"""[bold]Available Commands:[/bold]
+  status     - Show system status
+  process    - Process recent emails
+  classify   - Run classification
+  respond    - Show response suggestions
+  organize   - Run organization
+  memory     - Show learning information
+  feedback   - Provide feedback ({", ".join(_FEEDBACK_TYPES)})
+  quit/exit  - Exit interactive mode"""
+
+
+def _json_loads(data: str) -> Any:
+    """Parse JSON with orjson when installed (its errors subclass json.JSONDecodeError)."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=None)
+def _console():
+    """Shared rich console for beautiful output, created on first use."""
+    from rich.console import Console
+    return Console()
+
+
+def _progress(console):
+    """
+    Spinner progress display. It redraws at 2 Hz, is switched off when
+    output is not a terminal, and clears itself when done.
+    """
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console,
+        refresh_per_second=2,
+        disable=not console.is_terminal,
+        transient=True
+    )
+
+
+@lru_cache(maxsize=None)
+def _banner():
+    """Startup banner, built once and reused."""
+    from rich.panel import Panel
+    return Panel.fit(
+        "[bold blue]Email Agent System[/bold blue]\n"
+        "AI-powered email management with learning capabilities",
+        border_style="blue"
+    )
+
+
+@lru_cache(maxsize=None)
+def _help_panel():
+    """Interactive help panel, parsed from markup once and reused."""
+    from rich.panel import Panel
+    from rich.text import Text
+    return Panel(Text.from_markup(_HELP_MARKUP), title="Commands", border_style="blue")
+
+
+@lru_cache(maxsize=1)
+def _master_agent():
+    """Process-wide EmailMasterAgent, so repeated commands reuse one orchestrator."""
+    from .agent.email_master_agent import EmailMasterAgent
+    return EmailMasterAgent()
+
+
+def _print_table(title: str, headers: Sequence[str], rows: Sequence[Sequence[Any]],
+                 header_style: Optional[str] = None):
+    """
+    Print a small two-or-more column table.
+    
+    Rich tables are only worth their layout cost on an interactive
+    terminal; piped or logged output gets plain padded columns written in a
+    single call.
+    """
+    console = _console()
+    rows = [[str(cell) for cell in row] for row in rows]
+    
+    if console.is_terminal:
+        from rich.table import Table
+        
+        table = Table(title=title, show_header=True, header_style=header_style or "table.header")
+        table.add_column(headers[0], style="cyan")
+        for header in headers[1:]:
+            table.add_column(header, style="white")
+        for row in rows:
+            table.add_row(*row)
+        console.print(table)
+        return
+    
+    widths = [
+        max([len(header)] + [len(row[i]) for row in rows])
+        for i, header in enumerate(headers)
+    ]
+    lines = [title, "  ".join(h.ljust(w) for h, w in zip(headers, widths)).rstrip()]
+    lines.append("  ".join("-" * w for w in widths))
+    for row in rows:
+        lines.append("  ".join(cell.ljust(w) for cell, w in zip(row, widths)).rstrip())
+    console.print("\n".join(lines), markup=False, highlight=False, soft_wrap=True)
+
 
 @click.group()
 @click.option('--verbose', '-v', is_flag=True, help='Enable verbose logging')
@@ -42,78 +148,55 @@ def cli(verbose):
     if verbose:
         logging.getLogger().setLevel(logging.DEBUG)
     
-    console.print(Panel.fit(
-        "[bold blue]Email Agent System[/bold blue]\n"
-        "AI-powered email management with learning capabilities",
-        border_style="blue"
-    ))
+    _console().print(_banner())
 
 
 @cli.command()
 def status():
     """Show system status and agent information."""
+    console = _console()
     console.print("[bold]System Status[/bold]")
     
     try:
         # Initialize master agent
-        master_agent = EmailMasterAgent()
+        master_agent = _master_agent()
         
         # Get comprehensive status
         status_info = master_agent.get_comprehensive_status()
         
         # Display master agent status
-        master_table = Table(title="Master Agent Status", show_header=True, header_style="bold magenta")
-        master_table.add_column("Property", style="cyan")
-        master_table.add_column("Value", style="white")
-        
         master_status = status_info["master_agent"]
-        master_table.add_row("Name", master_status["name"])
-        master_table.add_row("Description", master_status["description"])
-        master_table.add_row("Active", str(master_status["is_active"]))
-        master_table.add_row("Available Tools", str(len(master_status["available_tools"])))
-        
-        console.print(master_table)
+        _print_table("Master Agent Status", ("Property", "Value"), [
+            ("Name", master_status["name"]),
+            ("Description", master_status["description"]),
+            ("Active", master_status["is_active"]),
+            ("Available Tools", len(master_status["available_tools"]))
+        ], header_style="bold magenta")
         console.print()
         
         # Display sub-agents status
-        sub_agents_table = Table(title="Sub-Agents Status", show_header=True, header_style="bold green")
-        sub_agents_table.add_column("Agent", style="cyan")
-        sub_agents_table.add_column("Tools", style="white")
-        sub_agents_table.add_column("Memory Events", style="white")
-        
-        for agent_name, agent_status in status_info["sub_agents"].items():
-            memory_summary = agent_status["memory_summary"]
-            sub_agents_table.add_row(
-                agent_name.title(),
-                str(len(agent_status["available_tools"])),
-                str(memory_summary["short_term_events"])
-            )
-        
-        console.print(sub_agents_table)
+        _print_table("Sub-Agents Status", ("Agent", "Tools", "Memory Events"), [
+            (agent_name.title(),
+             len(agent_status["available_tools"]),
+             agent_status["memory_summary"]["short_term_events"])
+            for agent_name, agent_status in status_info["sub_agents"].items()
+        ], header_style="bold green")
         console.print()
         
         # Display performance metrics
-        metrics_table = Table(title="Performance Metrics", show_header=True, header_style="bold yellow")
-        metrics_table.add_column("Metric", style="cyan")
-        metrics_table.add_column("Value", style="white")
-        
-        for metric, value in status_info["performance_metrics"].items():
-            metrics_table.add_row(metric.replace("_", " ").title(), str(value))
-        
-        console.print(metrics_table)
+        _print_table("Performance Metrics", ("Metric", "Value"), [
+            (metric.replace("_", " ").title(), value)
+            for metric, value in status_info["performance_metrics"].items()
+        ], header_style="bold yellow")
         console.print()
         
         # Display memory system info
         memory_info = status_info["memory_summary"]
-        memory_table = Table(title="Learning System", show_header=True, header_style="bold red")
-        memory_table.add_column("Component", style="cyan")
-        memory_table.add_column("Count", style="white")
-        
-        memory_table.add_row("Total Events", str(memory_info["total_events"]))
-        memory_table.add_row("User Preferences", str(memory_info["total_preferences"]))
-        memory_table.add_row("Recent Feedback", str(memory_info["recent_feedback_count"]))
-        
-        console.print(memory_table)
+        _print_table("Learning System", ("Component", "Count"), [
+            ("Total Events", memory_info["total_events"]),
+            ("User Preferences", memory_info["total_preferences"]),
+            ("Recent Feedback", memory_info["recent_feedback_count"])
+        ], header_style="bold red")
         
     except Exception as e:
         console.print(f"[bold red]Error getting status: {e}[/bold red]")
@@ -122,21 +205,19 @@ def status():
 @cli.command()
 @click.option('--limit', default=10, help='Number of emails to process')
 @click.option('--dry-run', is_flag=True, help='Show what would be done without executing')
-def process(limit, dry_run):
+@click.option('--batch', is_flag=True, help='Draft responses via the OpenAI Batch API (slower, cheaper; waits up to BATCH_WAIT_SECONDS)')
+def process(limit, dry_run, batch):
     """Process recent emails using the email agent system."""
+    console = _console()
     console.print(f"[bold]Processing {limit} recent emails[/bold]")
     
     if dry_run:
         console.print("[yellow]DRY RUN MODE - No actions will be executed[/yellow]")
     
     try:
-        master_agent = EmailMasterAgent()
+        master_agent = _master_agent()
         
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
+        with _progress(console) as progress:
             
             # Step 1: Perception
             task1 = progress.add_task("Getting recent emails...", total=None)
@@ -156,37 +237,48 @@ def process(limit, dry_run):
             # Step 3: Execution
             if not dry_run:
                 task3 = progress.add_task("Executing email processing...", total=None)
-                results = master_agent.act(actions)
+                
+                if batch:
+                    # One Batch API job drafts every response; a job that outlives
+                    # the batch_wait_seconds setting is cancelled and templates are used
+                    results = master_agent.run_batch_cycle(perception, actions)
+                else:
+                    # One action at a time: every action drives the same
+                    # sub-agents, which are not safe to share between threads
+                    results = [master_agent.execute_action(action) for action in actions]
                 progress.update(task3, description=f"Completed {len(results)} workflows")
                 
-                # Display results
+                # Display results, one console write per workflow
                 for i, result in enumerate(results):
                     if result.success:
                         workflow_data = result.result
-                        console.print(f"\n[green]Workflow {i+1} completed successfully[/green]")
+                        lines = [f"\n[green]Workflow {i+1} completed successfully[/green]"]
                         
                         # Show analysis results
                         if "analysis_results" in workflow_data:
                             analysis = workflow_data["analysis_results"]
-                            console.print(f"  • Classified {len(analysis.get('classification_results', []))} emails")
-                            console.print(f"  • Generated {len(analysis.get('response_candidates', []))} response suggestions")
-                            console.print(f"  • Created {len(analysis.get('organization_suggestions', []))} organization suggestions")
+                            lines.append(f"  • Classified {len(analysis.get('classification_results', []))} emails")
+                            lines.append(f"  • Generated {len(analysis.get('response_candidates', []))} response suggestions")
+                            lines.append(f"  • Created {len(analysis.get('organization_suggestions', []))} organization suggestions")
                         
                         # Show execution results
                         if "execution_results" in workflow_data:
                             execution = workflow_data["execution_results"]
-                            console.print(f"  • Successfully executed {execution.get('successful_actions', 0)} actions")
+                            lines.append(f"  • Successfully executed {execution.get('successful_actions', 0)} actions")
                             if execution.get('failed_actions', 0) > 0:
-                                console.print(f"  • [red]Failed to execute {execution['failed_actions']} actions[/red]")
+                                lines.append(f"  • [red]Failed to execute {execution['failed_actions']} actions[/red]")
+                        
+                        console.print("\n".join(lines))
                     else:
                         console.print(f"[red]Workflow {i+1} failed[/red]")
             else:
                 # Show what would be done in dry run
-                console.print("\n[bold]Planned Actions (Dry Run):[/bold]")
+                lines = ["\n[bold]Planned Actions (Dry Run):[/bold]"]
                 for action in actions:
-                    console.print(f"  • {action['type']}: {len(action.get('emails', []))} emails")
+                    lines.append(f"  • {action['type']}: {len(action.get('emails', []))} emails")
                     for step in action.get('steps', []):
-                        console.print(f"    - {step}")
+                        lines.append(f"    - {step}")
+                console.print("\n".join(lines))
         
     except Exception as e:
         console.print(f"[bold red]Error processing emails: {e}[/bold red]")
@@ -196,16 +288,15 @@ def process(limit, dry_run):
 @cli.command()
 def classify():
     """Run email classification on recent emails."""
+    from .agent.email_classifier import EmailClassifier
+    
+    console = _console()
     console.print("[bold]Running Email Classification[/bold]")
     
     try:
         classifier = EmailClassifier()
         
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
+        with _progress(console) as progress:
             
             task = progress.add_task("Classifying emails...", total=None)
             
@@ -219,14 +310,10 @@ def classify():
                 # Show summary
                 summary = classifier.get_classification_summary()
                 
-                categories_table = Table(title="Classification Results", show_header=True)
-                categories_table.add_column("Category", style="cyan")
-                categories_table.add_column("Count", style="white")
-                
-                for category, count in summary["category_distribution"].items():
-                    categories_table.add_row(category.title(), str(count))
-                
-                console.print(categories_table)
+                _print_table("Classification Results", ("Category", "Count"), [
+                    (category.title(), count)
+                    for category, count in summary["category_distribution"].items()
+                ])
                 console.print(f"\nTotal emails classified: {summary['total_classified']}")
             else:
                 console.print(f"[red]Classification failed: {result.get('error', 'Unknown error')}[/red]")
@@ -238,6 +325,12 @@ def classify():
 @cli.command()
 def responses():
     """Show pending response suggestions."""
+    from rich.panel import Panel
+    from rich.prompt import Confirm, Prompt
+    from rich.text import Text
+    from .agent.email_responder import EmailResponder
+    
+    console = _console()
     console.print("[bold]Pending Response Suggestions[/bold]")
     
     try:
@@ -249,14 +342,23 @@ def responses():
             return
         
         for i, response in enumerate(pending):
-            console.print(f"\n[bold cyan]Response {i+1}[/bold cyan]")
-            console.print(Panel(
-                f"[bold]From:[/bold] {response['original_sender']}\n"
-                f"[bold]Subject:[/bold] {response['original_subject']}\n"
-                f"[bold]Intent:[/bold] {response['intent']}\n"
-                f"[bold]Priority:[/bold] {response['priority']}\n\n"
-                f"[bold]Suggested Response:[/bold]\n{response['suggested_response']}",
-                title=f"Email ID: {response['email_id']}",
+            # Build the body as styled Text so email content is never parsed
+            # as console markup
+            body = Text()
+            body.append("From: ", style="bold")
+            body.append(f"{response['original_sender']}\n")
+            body.append("Subject: ", style="bold")
+            body.append(f"{response['original_subject']}\n")
+            body.append("Intent: ", style="bold")
+            body.append(f"{response['intent']}\n")
+            body.append("Priority: ", style="bold")
+            body.append(f"{response['priority']}\n\n")
+            body.append("Suggested Response:\n", style="bold")
+            body.append(str(response['suggested_response']))
+            
+            console.print(Text(f"\nResponse {i+1}", style="bold cyan"), Panel(
+                body,
+                title=Text(f"Email ID: {response['email_id']}"),
                 border_style="blue"
             ))
             
@@ -279,16 +381,15 @@ def responses():
 @cli.command()
 def organize():
     """Run inbox organization."""
+    from .agent.inbox_organizer import InboxOrganizer
+    
+    console = _console()
     console.print("[bold]Running Inbox Organization[/bold]")
     
     try:
         organizer = InboxOrganizer()
         
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
+        with _progress(console) as progress:
             
             task = progress.add_task("Organizing inbox...", total=None)
             
@@ -306,14 +407,10 @@ def organize():
                 # Show health metrics if available
                 health_metrics = report.get("health_metrics", {})
                 if health_metrics:
-                    metrics_table = Table(title="Organization Metrics")
-                    metrics_table.add_column("Metric", style="cyan")
-                    metrics_table.add_column("Value", style="white")
-                    
-                    for metric, value in health_metrics.items():
-                        metrics_table.add_row(metric.replace("_", " ").title(), str(value))
-                    
-                    console.print(metrics_table)
+                    _print_table("Organization Metrics", ("Metric", "Value"), [
+                        (metric.replace("_", " ").title(), value)
+                        for metric, value in health_metrics.items()
+                    ])
             else:
                 console.print(f"[red]Organization failed: {result.get('error', 'Unknown error')}[/red]")
         
@@ -324,40 +421,37 @@ def organize():
 @cli.command()
 def memory():
     """Show memory and learning information."""
+    from .memory.persistent_memory import memory as persistent_memory
+    
+    console = _console()
     console.print("[bold]Memory and Learning System[/bold]")
     
     try:
-        learning_summary = memory.get_learning_summary()
+        learning_summary = persistent_memory.get_learning_summary()
         
         # Summary table
-        summary_table = Table(title="Learning Summary", show_header=True)
-        summary_table.add_column("Component", style="cyan")
-        summary_table.add_column("Value", style="white")
-        
-        summary_table.add_row("Total Events", str(learning_summary["total_events"]))
-        summary_table.add_row("Total Preferences", str(learning_summary["total_preferences"]))
-        summary_table.add_row("Recent Feedback", str(learning_summary["recent_feedback_count"]))
-        
-        console.print(summary_table)
+        _print_table("Learning Summary", ("Component", "Value"), [
+            ("Total Events", learning_summary["total_events"]),
+            ("Total Preferences", learning_summary["total_preferences"]),
+            ("Recent Feedback", learning_summary["recent_feedback_count"])
+        ])
         console.print()
         
         # Preferences by category
         if learning_summary["preferences_by_category"]:
-            prefs_table = Table(title="Learned Preferences by Category", show_header=True)
-            prefs_table.add_column("Category", style="cyan")
-            prefs_table.add_column("Count", style="white")
-            
-            for category, count in learning_summary["preferences_by_category"].items():
-                prefs_table.add_row(category.title(), str(count))
-            
-            console.print(prefs_table)
+            _print_table("Learned Preferences by Category", ("Category", "Count"), [
+                (category.title(), count)
+                for category, count in learning_summary["preferences_by_category"].items()
+            ])
             console.print()
         
         # Learning metrics
         metrics = learning_summary["learning_metrics"]
-        console.print(f"[bold]Learning Effectiveness:[/bold]")
-        console.print(f"  • Average Confidence: {metrics['average_confidence']:.2f}")
-        console.print(f"  • High Confidence Preferences: {metrics['high_confidence_percentage']:.1f}%")
+        console.print(
+            "[bold]Learning Effectiveness:[/bold]\n"
+            f"  • Average Confidence: {metrics['average_confidence']:.2f}\n"
+            f"  • High Confidence Preferences: {metrics['high_confidence_percentage']:.1f}%"
+        )
         
     except Exception as e:
         console.print(f"[bold red]Error accessing memory system: {e}[/bold red]")
@@ -365,36 +459,36 @@ def memory():
 
 @cli.command()
 @click.argument('email_id')
-@click.option('--feedback-type', type=click.Choice(['classification', 'response', 'organization', 'priority']))
+@click.option('--feedback-type', type=click.Choice(_FEEDBACK_TYPES))
 @click.option('--feedback-data', help='JSON string with feedback data')
 def feedback(email_id, feedback_type, feedback_data):
     """Provide feedback to help the agent learn."""
+    from rich.prompt import Confirm, Prompt
+    
+    console = _console()
     console.print(f"[bold]Providing Feedback for Email {email_id}[/bold]")
     
     try:
-        if not feedback_data:
-            # Interactive feedback collection
-            if feedback_type == "classification":
-                correct_category = Prompt.ask("What is the correct category?")
-                feedback_data = json.dumps({"correct_category": correct_category})
-            elif feedback_type == "response":
-                approved = Confirm.ask("Was the suggested response appropriate?")
-                feedback_data = json.dumps({"approved": approved})
-            elif feedback_type == "priority":
-                correct_priority = int(Prompt.ask("What should the priority be (1-10)?"))
-                feedback_data = json.dumps({"correct_priority": correct_priority})
-            else:
-                feedback_data = json.dumps({"feedback": Prompt.ask("Enter feedback")})
+        if feedback_data:
+            # Parse feedback data
+            try:
+                feedback_dict = _json_loads(feedback_data)
+            except json.JSONDecodeError:
+                console.print("[red]Invalid JSON in feedback data[/red]")
+                return
         
-        # Parse feedback data
-        try:
-            feedback_dict = json.loads(feedback_data)
-        except json.JSONDecodeError:
-            console.print("[red]Invalid JSON in feedback data[/red]")
-            return
+        # Interactive feedback collection
+        elif feedback_type == "classification":
+            feedback_dict = {"correct_category": Prompt.ask("What is the correct category?")}
+        elif feedback_type == "response":
+            feedback_dict = {"approved": Confirm.ask("Was the suggested response appropriate?")}
+        elif feedback_type == "priority":
+            feedback_dict = {"correct_priority": int(Prompt.ask("What should the priority be (1-10)?"))}
+        else:
+            feedback_dict = {"feedback": Prompt.ask("Enter feedback")}
         
         # Submit feedback
-        master_agent = EmailMasterAgent()
+        master_agent = _master_agent()
         success = master_agent.process_user_feedback(
             email_id, 
             f"{feedback_type}_correction", 
@@ -414,34 +508,45 @@ def feedback(email_id, feedback_type, feedback_data):
 @cli.command()
 def interactive():
     """Interactive mode for exploring agent capabilities."""
-    console.print("[bold]Interactive Email Agent Mode[/bold]")
-    console.print("Type 'help' for available commands, 'quit' to exit")
+    from rich.console import Group
+    from rich.text import Text
+    from .memory.persistent_memory import memory as persistent_memory
     
-    master_agent = EmailMasterAgent()
+    # Each command's output is printed as one Group, so the console renders
+    # and writes it in a single pass
+    console = _console()
+    console.print(Group(
+        "[bold]Interactive Email Agent Mode[/bold]",
+        "Type 'help' for available commands, 'quit' to exit"
+    ))
+    
+    # Importing readline gives input() history and line editing
+    try:
+        import readline  # noqa: F401
+        prompt = _PROMPT_READLINE
+    except ImportError:
+        prompt = _PROMPT_ANSI
+    if not console.is_terminal:
+        prompt = _PROMPT_PLAIN
+    
+    master_agent = _master_agent()
     
     while True:
         try:
-            command = Prompt.ask("\n[cyan]email-agent>[/cyan]").strip().lower()
+            print()
+            command = input(prompt).strip().lower()
             
             if command == "quit" or command == "exit":
                 break
             elif command == "help":
-                console.print("""
-[bold]Available Commands:[/bold]
-  status     - Show system status
-  process    - Process recent emails
-  classify   - Run classification
-  respond    - Show response suggestions  
-  organize   - Run organization
-  memory     - Show learning information
-  feedback   - Provide feedback (interactive)
-  quit/exit  - Exit interactive mode
-                """)
+                console.print(_help_panel())
             elif command == "status":
                 status_info = master_agent.get_comprehensive_status()
-                console.print(f"System Health: {status_info['system_health']['overall_status']}")
-                console.print(f"Emails Processed: {status_info['performance_metrics']['emails_processed']}")
-                console.print(f"Active Sub-agents: {len(status_info['sub_agents'])}")
+                console.print(Group(
+                    f"System Health: {status_info['system_health']['overall_status']}",
+                    f"Emails Processed: {status_info['performance_metrics']['emails_processed']}",
+                    f"Active Sub-agents: {len(status_info['sub_agents'])}"
+                ))
             
             elif command == "process":
                 console.print("Running email processing...")
@@ -452,15 +557,19 @@ def interactive():
                     console.print(f"[red]Processing failed: {result.get('error', 'Unknown error')}[/red]")
             
             elif command == "memory":
-                summary = memory.get_learning_summary()
-                console.print(f"Events: {summary['total_events']}, Preferences: {summary['total_preferences']}")
-                console.print(f"Recent feedback: {summary['recent_feedback_count']}")
+                summary = persistent_memory.get_learning_summary()
+                console.print(Group(
+                    f"Events: {summary['total_events']}, Preferences: {summary['total_preferences']}",
+                    f"Recent feedback: {summary['recent_feedback_count']}"
+                ))
             
             else:
-                console.print(f"[red]Unknown command: {command}[/red]")
-                console.print("Type 'help' for available commands")
+                console.print(Group(
+                    Text(f"Unknown command: {command}", style="red"),
+                    "Type 'help' for available commands"
+                ))
         
-        except KeyboardInterrupt:
+        except (KeyboardInterrupt, EOFError):
             break
         except Exception as e:
             console.print(f"[red]Error: {e}[/red]")
@@ -1,40 +1,69 @@
 """Configuration settings for the email agent."""
 
-import os
+import logging
+from functools import lru_cache
 from typing import Optional
-from pydantic import BaseSettings, Field
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     """Application settings loaded from environment variables."""
     
+    # Loaded once and never mutated afterwards
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=False, frozen=True)
+    
     # API Keys
-    openai_api_key: Optional[str] = Field(None, env="OPENAI_API_KEY")
-    anthropic_api_key: Optional[str] = Field(None, env="ANTHROPIC_API_KEY")
+    openai_api_key: Optional[str] = None
+    anthropic_api_key: Optional[str] = None
     
     # Email Configuration
-    email_provider: str = Field("gmail", env="EMAIL_PROVIDER")
-    email_address: str = Field(..., env="EMAIL_ADDRESS")
-    email_password: str = Field(..., env="EMAIL_PASSWORD")
-    imap_server: str = Field("imap.gmail.com", env="IMAP_SERVER")
-    imap_port: int = Field(993, env="IMAP_PORT")
+    email_provider: str = "gmail"
+    email_address: str
+    email_password: str
+    imap_server: str = "imap.gmail.com"
+    imap_port: int = 993
+    imap_pool_size: int = 4
+    smtp_server: str = "smtp.gmail.com"
+    smtp_port: int = 465
     
     # Agent Configuration
-    agent_name: str = Field("EmailAssistant", env="AGENT_NAME")
-    agent_mode: str = Field("development", env="AGENT_MODE")
-    max_emails_per_batch: int = Field(50, env="MAX_EMAILS_PER_BATCH")
-    auto_execute_actions: bool = Field(False, env="AUTO_EXECUTE_ACTIONS")
+    agent_name: str = "EmailAssistant"
+    agent_mode: str = "development"
+    max_emails_per_batch: int = 50
+    # How long a Batch API response job may run before it is cancelled
+    batch_wait_seconds: int = 15 * 60
+    auto_execute_actions: bool = False
     
     # Database
-    database_url: str = Field("sqlite:///email_agent.db", env="DATABASE_URL")
+    database_url: str = "sqlite:///email_agent.db"
     
     # Logging
-    log_level: str = Field("INFO", env="LOG_LEVEL")
+    log_level: str = "INFO"
+    
+    @field_validator("log_level")
+    @classmethod
+    def _normalize_log_level(cls, value: str) -> str:
+        """Accept any case and reject names the logging module does not know."""
+        level = value.strip().upper()
+        if not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"Unknown log level: {value!r}")
+        return level
     
-    class Config:
-        env_file = ".env"
-        case_sensitive = False
+    @property
+    def log_level_int(self) -> int:
+        """Numeric logging level, ready for logging.basicConfig/setLevel."""
+        return logging.getLevelName(self.log_level)
+
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Return the process-wide settings, reading the environment on first use."""
+    return Settings()
 
 
-# Global settings instance
-settings = Settings()
\ No newline at end of file
+def __getattr__(name: str):
+    # Keep `from .settings import settings` working, but lazily
+    if name == "settings":
+        return get_settings()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,24 @@
+"""
+Logging configuration shared by the entry points.
+"""
+
+import logging
+
+from .config.settings import get_settings
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_done = False
+
+
+def configure():
+    """Configure root logging from settings; later calls do nothing."""
+    global _done
+    if _done:
+        return
+    _done = True
+    
+    logging.basicConfig(
+        level=get_settings().log_level_int,
+        format=LOG_FORMAT
+    )
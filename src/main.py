@@ -2,23 +2,18 @@
 Main entry point for the Email Agent System.
 
 This file demonstrates how to initialize and run the complete agent system.
+Run it from the project root with `python -m src.main`.
 """
 
 import logging
 import sys
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
-# Add src to path for imports
-sys.path.append(str(Path(__file__).parent))
-
-from agent.email_master_agent import EmailMasterAgent
-from config.settings import settings
+from .agent.email_master_agent import EmailMasterAgent
+from . import logging_setup
 
 # Configure logging
-logging.basicConfig(
-    level=getattr(logging, settings.log_level),
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+logging_setup.configure()
 
 logger = logging.getLogger(__name__)
 
@@ -36,15 +31,21 @@ def main():
         print("Email Agent System - AI-Powered Email Management")
         print("=" * 60)
         
-        status = master_agent.get_comprehensive_status()
-        print(f"Master Agent: {status['master_agent']['name']}")
-        print(f"Sub-agents: {len(status['sub_agents'])}")
-        print(f"System Health: {status['system_health']['overall_status']}")
-        print()
-        
-        # Run a demonstration cycle
-        print("Running demonstration email processing cycle...")
-        result = master_agent.run_cycle()
+        # Start the demonstration cycle in the background while the status
+        # header is gathered and printed
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            status_future = executor.submit(master_agent.get_comprehensive_status)
+            cycle_future = executor.submit(master_agent.run_cycle)
+            
+            status = status_future.result()
+            print(f"Master Agent: {status['master_agent']['name']}")
+            print(f"Sub-agents: {len(status['sub_agents'])}")
+            print(f"System Health: {status['system_health']['overall_status']}")
+            print()
+            
+            # Run a demonstration cycle
+            print("Running demonstration email processing cycle...")
+            result = cycle_future.result()
         
         if result["success"]:
             print("✓ Email processing completed successfully")
@@ -5,20 +5,105 @@ This system shows how agents can learn from user feedback and improve over time.
 It implements both short-term context and long-term learning storage.
 """
 
+import atexit
+import itertools
 import json
 import sqlite3
 import logging
-from typing import Any, Dict, List, Optional, Tuple
+import queue
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
 from pathlib import Path
 
+import numpy as np
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Number of most recent events kept in memory
+_MAX_RECENT_EVENTS = 1000
+
+# Number of most recent contributing event ids kept per preference
+_MAX_LEARNED_FROM = 50
+
+# Rows fetched per round trip while streaming search results
+_SEARCH_FETCH_SIZE = 50
+
+# Write statements, kept as constants so sqlite3's statement cache always
+# sees identical SQL text
+_INSERT_EVENT_SQL = """
+    INSERT INTO memory_events (id, timestamp, event_type, data, importance, tags)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+_INSERT_FEEDBACK_SQL = """
+    INSERT INTO user_feedback (feedback_id, event_id, feedback_type, 
+                             feedback_value, timestamp)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+_INSERT_PREF_SQL = """
+    INSERT OR REPLACE INTO user_preferences 
+    (category, preference_key, preference_value, confidence, 
+     learned_from, last_updated)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# Updates an existing preference in place. The event id is appended to
+# learned_from inside SQLite, unless the list is full, in which case the
+# capped list is passed in whole (the first parameter of the COALESCE).
+_UPDATE_PREF_SQL = """
+    UPDATE user_preferences
+    SET preference_value = ?,
+        confidence = MIN(1.0, confidence + ?),
+        learned_from = COALESCE(?, json_insert(learned_from, '$[#]', ?)),
+        last_updated = ?
+    WHERE category = ? AND preference_key = ?
+"""
+
+
+def _dumps(value: Any) -> str:
+    """Serialize a column value to JSON text, using orjson when installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _loads(text: str) -> Any:
+    """Parse a JSON column value, using orjson when installed."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+# Confidence above which a preference counts as well learned
+_HIGH_CONFIDENCE = 0.7
+
+
+def _confidence_stats(confidences: np.ndarray, threshold: float) -> Tuple[float, int]:
+    """Sum of the confidences and how many are above `threshold`."""
+    return float(confidences.sum()), int(np.count_nonzero(confidences > threshold))
+
 
 @dataclass
 class MemoryEvent:
     """Represents a single memory event."""
+    # Declared by hand rather than with dataclass(slots=True), which needs
+    # Python 3.10. timestamp_iso is the ISO form of `timestamp`, as stored
+    # in the database.
+    __slots__ = ('id', 'timestamp', 'event_type', 'data', 'importance', 'tags',
+                 'timestamp_iso')
+    
     id: str
     timestamp: datetime
     event_type: str
@@ -26,10 +111,13 @@ class MemoryEvent:
     importance: float  # 0.0 - 1.0
     tags: List[str]
     
+    def __post_init__(self):
+        self.timestamp_iso = self.timestamp.isoformat()
+    
     def to_dict(self) -> Dict[str, Any]:
         return {
             "id": self.id,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp": self.timestamp_iso,
             "event_type": self.event_type,
             "data": self.data,
             "importance": self.importance,
@@ -37,27 +125,76 @@ class MemoryEvent:
         }
 
 
+class _StoredEvent(MemoryEvent):
+    """
+    MemoryEvent read back from a database row.
+    
+    `timestamp`, `data` and `tags` are decoded on first access, so events
+    that are loaded but never looked at cost no JSON parsing.
+    """
+    __slots__ = ('_row',)
+    
+    def __init__(self, row: Tuple):
+        self.id = row[0]
+        self.timestamp_iso = row[1]
+        self.event_type = row[2]
+        self.importance = row[4]
+        self._row = row
+    
+    def __getattr__(self, name: str) -> Any:
+        # Only called for attributes not set yet
+        if name == "timestamp":
+            value = datetime.fromisoformat(self.timestamp_iso)
+        elif name == "data":
+            value = _loads(self._row[3])
+        elif name == "tags":
+            value = _loads(self._row[5])
+        else:
+            raise AttributeError(name)
+        setattr(self, name, value)
+        return value
+
+
 @dataclass
 class UserPreference:
     """Represents a learned user preference."""
+    __slots__ = ('category', 'preference_key', 'preference_value', 'confidence',
+                 'learned_from', 'last_updated')
+    
     category: str
     preference_key: str
     preference_value: Any
     confidence: float  # 0.0 - 1.0
-    learned_from: List[str]  # Event IDs that contributed to this preference
+    learned_from: Deque[str]  # Most recent event IDs that contributed to this preference
     last_updated: datetime
     
+    def __post_init__(self):
+        if not isinstance(self.learned_from, deque):
+            self.learned_from = deque(self.learned_from, maxlen=_MAX_LEARNED_FROM)
+    
     def to_dict(self) -> Dict[str, Any]:
         return {
             "category": self.category,
             "preference_key": self.preference_key,
             "preference_value": self.preference_value,
             "confidence": self.confidence,
-            "learned_from": self.learned_from,
+            "learned_from": list(self.learned_from),
             "last_updated": self.last_updated.isoformat()
         }
 
 
+def _make_preference(row: Tuple) -> UserPreference:
+    """Build a UserPreference from a user_preferences row (positional, the fast path)."""
+    return UserPreference(
+        row[0],
+        row[1],
+        _loads(row[2]),
+        row[3],
+        _loads(row[4]),
+        datetime.fromisoformat(row[5])
+    )
+
+
 class PersistentMemory:
     """
     Advanced memory system that demonstrates agent learning capabilities.
@@ -73,19 +210,91 @@ class PersistentMemory:
     def __init__(self, db_path: str = "email_agent_memory.db"):
         self.db_path = db_path
         self.connection = None
+        # The agents call into memory from worker threads, so the one
+        # connection is shared and every use of it is serialized here
+        self._lock = threading.RLock()
+        
+        # Rows waiting to be written; flush() writes them in one transaction
+        self._pending_events: List[Tuple] = []
+        self._pending_feedback: List[Tuple] = []
+        self._pending_prefs: Dict[Tuple[str, str], Tuple] = {}
+        self._pending_pref_updates: List[Tuple] = []
+        self._batch_depth = 0
+        # Thread that holds the open batch, if any
+        self._batch_owner: Optional[int] = None
+        # Suffix for generated ids, so ids made on the same clock tick by
+        # different threads still differ; next() on a count is atomic
+        self._id_counter = itertools.count()
+        
         self._initialize_database()
         
         # In-memory caches for performance
-        self.recent_events: List[MemoryEvent] = []
-        self.user_preferences: Dict[str, UserPreference] = {}
+        self.recent_events: Deque[MemoryEvent] = deque(maxlen=_MAX_RECENT_EVENTS)
+        self._event_index: Dict[str, MemoryEvent] = {}
+        # Keyed by (category, preference_key)
+        self.user_preferences: Dict[Tuple[str, str], UserPreference] = {}
         self.pattern_cache: Dict[str, Any] = {}
         
+        # Preference confidences in one contiguous array, one slot per
+        # preference, so the learning metrics are computed without a Python loop
+        self._confidences = np.zeros(64)
+        self._pref_slots: Dict[Tuple[str, str], int] = {}
+        
+        # Learning step for each kind of feedback
+        self._feedback_handlers = {
+            # User corrected email classification
+            "classification_correction": self._update_classification_preference,
+            # User approved/rejected generated response
+            "response_approval": self._update_response_preference,
+            # User changed organization behavior
+            "organization_preference": self._update_organization_preference,
+            # User changed priority assessment
+            "priority_adjustment": self._update_priority_preference,
+        }
+        
         self._load_recent_data()
+        
+        # Feedback is recorded and learned from on a background thread, so
+        # callers do not wait on the database. Once closed, feedback is
+        # recorded by the calling thread; _closed is only read and set under
+        # _close_lock. A failed background write is kept in _writer_error
+        # and raised to the next reader.
+        self._write_q: "queue.Queue[Optional[Tuple]]" = queue.Queue()
+        self._close_lock = threading.Lock()
+        self._closed = False
+        self._writer_error: Optional[Exception] = None
+        self._writer = threading.Thread(
+            target=self._writer_loop,
+            name="memory-writer",
+            daemon=True
+        )
+        self._writer.start()
     
     def _initialize_database(self):
         """Initialize SQLite database with required tables."""
-        self.connection = sqlite3.connect(self.db_path)
-        cursor = self.connection.cursor()
+        # Autocommit mode; flush() opens and commits its own transactions.
+        # The statement cache is sized to hold every statement used here.
+        self.connection = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256
+        )
+        # One long-lived cursor, always used under self._lock
+        self._cursor = self.connection.cursor()
+        cursor = self._cursor
+        
+        # WAL lets readers run alongside the writer, and NORMAL sync skips
+        # the per-commit fsync that WAL does not need for durability. An
+        # in-memory database has no journal file, so it keeps its own mode.
+        if self.db_path != ":memory:":
+            cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        # Wait for another process's write lock instead of failing at once
+        cursor.execute("PRAGMA busy_timeout=3000")
         
         # Events table
         cursor.execute("""
@@ -135,12 +344,25 @@ class PersistentMemory:
             )
         """)
         
-        self.connection.commit()
+        # Indexes for the time-range and event-type lookups
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_events_ts
+            ON memory_events(timestamp DESC)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_events_type_ts
+            ON memory_events(event_type, timestamp DESC)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_feedback_ts
+            ON user_feedback(timestamp)
+        """)
+        
         logger.info("Memory database initialized")
     
     def _load_recent_data(self):
         """Load recent data into memory for quick access."""
-        cursor = self.connection.cursor()
+        cursor = self._cursor
         
         # Load recent events (last 7 days)
         week_ago = datetime.now() - timedelta(days=7)
@@ -149,19 +371,14 @@ class PersistentMemory:
             FROM memory_events
             WHERE timestamp > ?
             ORDER BY timestamp DESC
-            LIMIT 1000
-        """, (week_ago.isoformat(),))
+            LIMIT ?
+        """, (week_ago.isoformat(), _MAX_RECENT_EVENTS))
         
-        for row in cursor.fetchall():
-            event = MemoryEvent(
-                id=row[0],
-                timestamp=datetime.fromisoformat(row[1]),
-                event_type=row[2],
-                data=json.loads(row[3]),
-                importance=row[4],
-                tags=json.loads(row[5])
-            )
+        # Oldest first, so the deque evicts the oldest events as new ones arrive
+        for row in reversed(cursor.fetchall()):
+            event = _StoredEvent(row)
             self.recent_events.append(event)
+            self._event_index[event.id] = event
         
         # Load user preferences
         cursor.execute("""
@@ -171,111 +388,262 @@ class PersistentMemory:
         """)
         
         for row in cursor.fetchall():
-            pref = UserPreference(
-                category=row[0],
-                preference_key=row[1],
-                preference_value=json.loads(row[2]),
-                confidence=row[3],
-                learned_from=json.loads(row[4]),
-                last_updated=datetime.fromisoformat(row[5])
-            )
-            key = f"{pref.category}.{pref.preference_key}"
+            pref = _make_preference(row)
+            key = (pref.category, pref.preference_key)
             self.user_preferences[key] = pref
+            self._set_confidence(key, pref.confidence)
         
         logger.info(f"Loaded {len(self.recent_events)} recent events and {len(self.user_preferences)} preferences")
     
-    def add_event(self, event_type: str, data: Dict[str, Any], 
+    @contextmanager
+    def batch(self):
+        """
+        Group writes into one transaction.
+        
+        Events and feedback added inside the block are written when the
+        outermost block exits. The lock is held throughout, so other threads
+        see either none or all of the batch.
+        """
+        with self._lock:
+            if self._batch_depth == 0:
+                self._batch_owner = threading.get_ident()
+            self._batch_depth += 1
+            try:
+                yield
+            finally:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self._batch_owner = None
+                    self.flush()
+    
+    def _in_own_batch(self) -> bool:
+        """Whether the calling thread has a batch open."""
+        return self._batch_owner == threading.get_ident()
+    
+    def flush(self):
+        """
+        Write all queued events, feedback and preferences in one transaction.
+        
+        If a row breaks a constraint (a duplicate id, say), the batch is
+        written again row by row and only the offending rows are skipped.
+        On any other error the transaction is rolled back, the rows stay
+        queued for the next flush and the error is raised.
+        """
+        with self._lock:
+            batches = (
+                (_INSERT_EVENT_SQL, self._pending_events),
+                (_INSERT_FEEDBACK_SQL, self._pending_feedback),
+                (_INSERT_PREF_SQL, list(self._pending_prefs.values())),
+                (_UPDATE_PREF_SQL, self._pending_pref_updates)
+            )
+            if not any(rows for _, rows in batches):
+                return
+            
+            try:
+                self._write_batches(batches, self._executemany)
+            except sqlite3.IntegrityError as e:
+                logger.warning(f"Memory batch rejected ({e}); writing it row by row")
+                self._write_batches(batches, self._execute_each)
+            
+            self._pending_events.clear()
+            self._pending_feedback.clear()
+            self._pending_prefs.clear()
+            self._pending_pref_updates.clear()
+    
+    def _write_batches(self, batches: Tuple[Tuple[str, List[Tuple]], ...],
+                       write: Callable[[str, List[Tuple]], None]) -> None:
+        """Run `write` for every non-empty batch inside one transaction."""
+        cursor = self._cursor
+        try:
+            cursor.execute("BEGIN")
+            for sql, rows in batches:
+                if rows:
+                    write(sql, rows)
+            cursor.execute("COMMIT")
+        except sqlite3.Error:
+            # After close() there is no connection to roll back
+            if self.connection is not None and self.connection.in_transaction:
+                cursor.execute("ROLLBACK")
+            raise
+    
+    def _executemany(self, sql: str, rows: List[Tuple]) -> None:
+        self._cursor.executemany(sql, rows)
+    
+    def _execute_each(self, sql: str, rows: List[Tuple]) -> None:
+        """Write rows one at a time, skipping those that break a constraint."""
+        cursor = self._cursor
+        for row in rows:
+            cursor.execute("SAVEPOINT memory_row")
+            try:
+                cursor.execute(sql, row)
+            except sqlite3.IntegrityError as e:
+                cursor.execute("ROLLBACK TO memory_row")
+                logger.error(f"Dropped memory row {row[0]!r}: {e}")
+            cursor.execute("RELEASE memory_row")
+    
+    def add_event(self, event_type: str, data: Union[Dict[str, Any], str], 
                   importance: float = 0.5, tags: List[str] = None) -> str:
-        """Add a new memory event."""
-        event_id = f"{event_type}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        """
+        Add a new memory event.
+        
+        `data` may also be given already serialized as JSON text; it is
+        then decoded only if the event's data is read.
+        """
+        event_id = f"{event_type}_{time.time_ns():020d}_{next(self._id_counter)}"
         timestamp = datetime.now()
         tags = tags or []
         
-        event = MemoryEvent(
-            id=event_id,
-            timestamp=timestamp,
-            event_type=event_type,
-            data=data,
-            importance=importance,
-            tags=tags
-        )
-        
-        # Add to in-memory cache
-        self.recent_events.append(event)
-        
-        # Keep only recent events in memory
-        if len(self.recent_events) > 1000:
-            self.recent_events = self.recent_events[-1000:]
-        
-        # Store in database
-        cursor = self.connection.cursor()
-        cursor.execute("""
-            INSERT INTO memory_events (id, timestamp, event_type, data, importance, tags)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
+        # Serialized before taking the lock, so other writers do not wait on it
+        data_json = data if isinstance(data, str) else _dumps(data)
+        row = (
             event_id,
             timestamp.isoformat(),
             event_type,
-            json.dumps(data),
+            data_json,
             importance,
-            json.dumps(tags)
-        ))
-        self.connection.commit()
+            _dumps(tags)
+        )
+        
+        if isinstance(data, str):
+            # Backed by its row, like an event read from the database
+            event = _StoredEvent(row)
+            event.timestamp = timestamp
+            event.tags = tags
+        else:
+            event = MemoryEvent(
+                id=event_id,
+                timestamp=timestamp,
+                event_type=event_type,
+                data=data,
+                importance=importance,
+                tags=tags
+            )
+        
+        with self.batch():
+            # Add to in-memory cache
+            # The deque drops its oldest event when full; keep the index in step
+            if len(self.recent_events) == self.recent_events.maxlen:
+                self._event_index.pop(self.recent_events[0].id, None)
+            self.recent_events.append(event)
+            self._event_index[event_id] = event
+            
+            # Queue for the database
+            self._pending_events.append(row)
         
         logger.debug(f"Added memory event: {event_type}")
         return event_id
     
     def add_user_feedback(self, event_id: str, feedback_type: str, 
                          feedback_value: Any) -> None:
-        """Record user feedback for learning."""
-        feedback_id = f"feedback_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
-        
-        cursor = self.connection.cursor()
-        cursor.execute("""
-            INSERT INTO user_feedback (feedback_id, event_id, feedback_type, 
-                                     feedback_value, timestamp)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
+        """
+        Record user feedback for learning.
+        
+        The feedback is queued and handled on the writer thread; reads wait
+        for queued feedback, so they always see its effect. Inside batch()
+        it is handled right away and written with the rest of the batch,
+        and after close() it is written by the calling thread.
+        """
+        feedback_id = f"feedback_{time.time_ns():020d}_{next(self._id_counter)}"
+        # One timestamp for the feedback row and every preference it updates
+        now = datetime.now()
+        
+        item = (feedback_id, event_id, feedback_type, feedback_value, now)
+        if self._in_own_batch():
+            self._record_feedback(*item)
+        elif not self._queue_feedback(item):
+            with self.batch():
+                self._record_feedback(*item)
+        logger.info(f"Recorded user feedback: {feedback_type} for event {event_id}")
+    
+    def _queue_feedback(self, item: Tuple) -> bool:
+        """Hand feedback to the writer thread; False once closed."""
+        with self._close_lock:
+            if self._closed:
+                return False
+            self._write_q.put(item)
+            return True
+    
+    def _writer_loop(self):
+        """Drain queued feedback, writing each drained burst in one transaction."""
+        while True:
+            items = [self._write_q.get()]
+            while True:
+                try:
+                    items.append(self._write_q.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stop = False
+            try:
+                with self.batch():
+                    for item in items:
+                        if item is None:
+                            stop = True
+                            continue
+                        self._record_feedback(*item)
+            except Exception as e:
+                logger.error(f"Failed to record feedback: {e}")
+                with self._lock:
+                    self._writer_error = e
+            finally:
+                for _ in items:
+                    self._write_q.task_done()
+            
+            if stop:
+                return
+    
+    def _record_feedback(self, feedback_id: str, event_id: str, feedback_type: str,
+                         feedback_value: Any, now: datetime) -> None:
+        """Queue the feedback row and learn from it (writer thread)."""
+        # Formatted once; the feedback row and every preference row share it
+        now_iso = now.isoformat()
+        self._pending_feedback.append((
             feedback_id,
             event_id,
             feedback_type,
-            json.dumps(feedback_value),
-            datetime.now().isoformat()
+            _dumps(feedback_value),
+            now_iso
         ))
-        self.connection.commit()
         
         # Trigger learning from feedback
-        self._learn_from_feedback(event_id, feedback_type, feedback_value)
-        
-        logger.info(f"Recorded user feedback: {feedback_type} for event {event_id}")
+        self._learn_from_feedback(event_id, feedback_type, feedback_value, now, now_iso)
+    
+    def _wait_for_writer(self):
+        """
+        Block until queued feedback has been applied, then raise the error
+        of a failed background write, if there was one since the last call.
+        """
+        if threading.current_thread() is self._writer:
+            return
+        # The writer needs the lock, so a thread inside its own batch cannot
+        # wait for it; that thread's feedback is applied in place anyway
+        if not self._in_own_batch():
+            self._write_q.join()
+        with self._lock:
+            error, self._writer_error = self._writer_error, None
+        if error is not None:
+            raise error
     
     def _learn_from_feedback(self, event_id: str, feedback_type: str, 
-                           feedback_value: Any) -> None:
+                           feedback_value: Any, now: datetime,
+                           now_iso: str) -> None:
         """Learn and update preferences based on user feedback."""
         # Find the original event
         event = self.get_event(event_id)
         if not event:
             return
         
-        # Extract learning patterns based on feedback type
-        if feedback_type == "classification_correction":
-            # User corrected email classification
-            self._update_classification_preference(event, feedback_value)
-        
-        elif feedback_type == "response_approval":
-            # User approved/rejected generated response
-            self._update_response_preference(event, feedback_value)
-        
-        elif feedback_type == "organization_preference":
-            # User changed organization behavior
-            self._update_organization_preference(event, feedback_value)
-        
-        elif feedback_type == "priority_adjustment":
-            # User changed priority assessment
-            self._update_priority_preference(event, feedback_value)
+        # Extract learning patterns based on feedback type. All preference
+        # rows it produces (one per keyword for classification corrections)
+        # are written by a single executemany when the batch closes.
+        handler = self._feedback_handlers.get(feedback_type)
+        if handler:
+            with self.batch():
+                handler(event, feedback_value, now, now_iso)
     
     def _update_classification_preference(self, event: MemoryEvent, 
-                                        correction: Dict[str, Any]) -> None:
+                                        correction: Dict[str, Any],
+                                        now: datetime, now_iso: str) -> None:
         """Learn from email classification corrections."""
         original_classification = event.data.get("classification_result")
         corrected_classification = correction.get("correct_category")
@@ -289,7 +657,9 @@ class PersistentMemory:
                     preference_key=f"sender_category_{sender}",
                     preference_value=corrected_classification,
                     event_id=event.id,
-                    confidence_boost=0.3
+                    confidence_boost=0.3,
+                    now=now,
+                    now_iso=now_iso
                 )
             
             # Learn keyword-based preferences
@@ -300,11 +670,14 @@ class PersistentMemory:
                     preference_key=f"keyword_category_{keyword}",
                     preference_value=corrected_classification,
                     event_id=event.id,
-                    confidence_boost=0.2
+                    confidence_boost=0.2,
+                    now=now,
+                    now_iso=now_iso
                 )
     
     def _update_response_preference(self, event: MemoryEvent, 
-                                  approval: Dict[str, Any]) -> None:
+                                  approval: Dict[str, Any],
+                                  now: datetime, now_iso: str) -> None:
         """Learn from response approval/rejection."""
         approved = approval.get("approved", False)
         response_style = event.data.get("response_style", "")
@@ -317,11 +690,14 @@ class PersistentMemory:
                 preference_key=f"intent_style_{intent}",
                 preference_value=preference_value,
                 event_id=event.id,
-                confidence_boost=0.4 if approved else -0.2
+                confidence_boost=0.4 if approved else -0.2,
+                now=now,
+                now_iso=now_iso
             )
     
     def _update_organization_preference(self, event: MemoryEvent, 
-                                      preference: Dict[str, Any]) -> None:
+                                      preference: Dict[str, Any],
+                                      now: datetime, now_iso: str) -> None:
         """Learn from organization behavior preferences."""
         org_action = preference.get("action")
         sender = event.data.get("email_sender", "")
@@ -332,11 +708,14 @@ class PersistentMemory:
                 preference_key=f"sender_action_{sender}",
                 preference_value=org_action,
                 event_id=event.id,
-                confidence_boost=0.3
+                confidence_boost=0.3,
+                now=now,
+                now_iso=now_iso
             )
     
     def _update_priority_preference(self, event: MemoryEvent, 
-                                  priority_adjustment: Dict[str, Any]) -> None:
+                                  priority_adjustment: Dict[str, Any],
+                                  now: datetime, now_iso: str) -> None:
         """Learn from priority adjustments."""
         original_priority = event.data.get("calculated_priority", 0)
         adjusted_priority = priority_adjustment.get("correct_priority", 0)
@@ -349,22 +728,29 @@ class PersistentMemory:
                 preference_key=f"sender_priority_{sender}",
                 preference_value=adjusted_priority,
                 event_id=event.id,
-                confidence_boost=0.4
+                confidence_boost=0.4,
+                now=now,
+                now_iso=now_iso
             )
     
     def _update_preference(self, category: str, preference_key: str, 
                           preference_value: Any, event_id: str, 
-                          confidence_boost: float = 0.1) -> None:
+                          confidence_boost: float = 0.1,
+                          now: Optional[datetime] = None,
+                          now_iso: Optional[str] = None) -> None:
         """Update or create a user preference."""
-        full_key = f"{category}.{preference_key}"
+        now = now or datetime.now()
+        now_iso = now_iso or now.isoformat()
+        key = (category, preference_key)
         
-        if full_key in self.user_preferences:
+        pref = self.user_preferences.get(key)
+        is_new = pref is None
+        if not is_new:
             # Update existing preference
-            pref = self.user_preferences[full_key]
             pref.preference_value = preference_value
             pref.confidence = min(1.0, pref.confidence + confidence_boost)
             pref.learned_from.append(event_id)
-            pref.last_updated = datetime.now()
+            pref.last_updated = now
         else:
             # Create new preference
             pref = UserPreference(
@@ -373,71 +759,93 @@ class PersistentMemory:
                 preference_value=preference_value,
                 confidence=max(0.0, 0.5 + confidence_boost),
                 learned_from=[event_id],
-                last_updated=datetime.now()
+                last_updated=now
             )
-            self.user_preferences[full_key] = pref
-        
-        # Save to database
-        cursor = self.connection.cursor()
-        cursor.execute("""
-            INSERT OR REPLACE INTO user_preferences 
-            (category, preference_key, preference_value, confidence, 
-             learned_from, last_updated)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (
-            category,
-            preference_key,
-            json.dumps(preference_value),
-            pref.confidence,
-            json.dumps(pref.learned_from),
-            pref.last_updated.isoformat()
-        ))
-        self.connection.commit()
-        
-        logger.info(f"Updated preference: {full_key} (confidence: {pref.confidence:.2f})")
+            self.user_preferences[key] = pref
+        self._set_confidence(key, pref.confidence)
+        
+        # Queue for the database. New preferences are inserted whole (a later
+        # update in this batch replaces the queued row); stored ones are
+        # updated in place.
+        with self.batch():
+            if is_new or key in self._pending_prefs:
+                self._pending_prefs[key] = (
+                    category,
+                    preference_key,
+                    _dumps(preference_value),
+                    pref.confidence,
+                    _dumps(list(pref.learned_from)),
+                    now_iso
+                )
+            else:
+                full = len(pref.learned_from) == _MAX_LEARNED_FROM
+                self._pending_pref_updates.append((
+                    _dumps(preference_value),
+                    confidence_boost,
+                    _dumps(list(pref.learned_from)) if full else None,
+                    event_id,
+                    now_iso,
+                    category,
+                    preference_key
+                ))
+        
+        logger.info(f"Updated preference: {category}.{preference_key} (confidence: {pref.confidence:.2f})")
+    
+    def _set_confidence(self, key: Tuple[str, str], confidence: float) -> None:
+        """Store a preference's confidence in its slot, adding a slot if new."""
+        slot = self._pref_slots.get(key)
+        if slot is None:
+            slot = len(self._pref_slots)
+            if slot == len(self._confidences):
+                grown = np.zeros(2 * len(self._confidences))
+                grown[:slot] = self._confidences
+                self._confidences = grown
+            self._pref_slots[key] = slot
+        self._confidences[slot] = confidence
     
     def get_preference(self, category: str, preference_key: str, 
                       default: Any = None) -> Tuple[Any, float]:
         """Get a user preference with confidence level."""
-        full_key = f"{category}.{preference_key}"
-        
-        if full_key in self.user_preferences:
-            pref = self.user_preferences[full_key]
+        self._wait_for_writer()
+        pref = self.user_preferences.get((category, preference_key))
+        if pref is not None:
             return pref.preference_value, pref.confidence
         
         return default, 0.0
     
     def get_event(self, event_id: str) -> Optional[MemoryEvent]:
         """Retrieve a specific event by ID."""
+        self._wait_for_writer()
         # Check in-memory cache first
-        for event in self.recent_events:
-            if event.id == event_id:
-                return event
+        event = self._event_index.get(event_id)
+        if event is not None:
+            return event
         
         # Query database
-        cursor = self.connection.cursor()
-        cursor.execute("""
-            SELECT id, timestamp, event_type, data, importance, tags
-            FROM memory_events
-            WHERE id = ?
-        """, (event_id,))
-        
-        row = cursor.fetchone()
+        with self._lock:
+            self.flush()
+            cursor = self._cursor
+            cursor.execute("""
+                SELECT id, timestamp, event_type, data, importance, tags
+                FROM memory_events
+                WHERE id = ?
+            """, (event_id,))
+            
+            row = cursor.fetchone()
         if row:
-            return MemoryEvent(
-                id=row[0],
-                timestamp=datetime.fromisoformat(row[1]),
-                event_type=row[2],
-                data=json.loads(row[3]),
-                importance=row[4],
-                tags=json.loads(row[5])
-            )
+            return _StoredEvent(row)
         
         return None
     
     def search_events(self, event_type: str = None, tags: List[str] = None,
-                     since: datetime = None, limit: int = 100) -> List[MemoryEvent]:
-        """Search for events matching criteria."""
+                     since: datetime = None, limit: int = 100) -> Iterator[MemoryEvent]:
+        """
+        Search for events matching criteria, newest first.
+        
+        Results are yielded as they are read, so a caller that stops early
+        never decodes the remaining rows. Wrap in list() to get them all.
+        """
+        self._wait_for_writer()
         conditions = []
         params = []
         
@@ -449,6 +857,15 @@ class PersistentMemory:
             conditions.append("timestamp >= ?")
             params.append(since.isoformat())
         
+        if tags:
+            # Match any of the tags inside SQLite, before rows are decoded
+            placeholders = ", ".join("?" * len(tags))
+            conditions.append(
+                "EXISTS (SELECT 1 FROM json_each(memory_events.tags) "
+                f"WHERE json_each.value IN ({placeholders}))"
+            )
+            params.extend(tags)
+        
         query = "SELECT id, timestamp, event_type, data, importance, tags FROM memory_events"
         if conditions:
             query += " WHERE " + " AND ".join(conditions)
@@ -456,30 +873,26 @@ class PersistentMemory:
         query += " ORDER BY timestamp DESC LIMIT ?"
         params.append(limit)
         
-        cursor = self.connection.cursor()
-        cursor.execute(query, params)
-        
-        events = []
-        for row in cursor.fetchall():
-            event = MemoryEvent(
-                id=row[0],
-                timestamp=datetime.fromisoformat(row[1]),
-                event_type=row[2],
-                data=json.loads(row[3]),
-                importance=row[4],
-                tags=json.loads(row[5])
-            )
-            
-            # Filter by tags if specified
-            if tags and not any(tag in event.tags for tag in tags):
-                continue
-            
-            events.append(event)
-        
-        return events
+        # A cursor of its own, since the shared one may be reused between
+        # yields; the lock is only held while talking to SQLite
+        with self._lock:
+            self.flush()
+            cursor = self.connection.execute(query, params)
+        
+        try:
+            while True:
+                with self._lock:
+                    rows = cursor.fetchmany(_SEARCH_FETCH_SIZE)
+                if not rows:
+                    break
+                for row in rows:
+                    yield _StoredEvent(row)
+        finally:
+            cursor.close()
     
     def get_learning_summary(self) -> Dict[str, Any]:
         """Get summary of learned patterns and preferences."""
+        self._wait_for_writer()
         return {
             "total_events": len(self.recent_events),
             "total_preferences": len(self.user_preferences),
@@ -497,12 +910,12 @@ class PersistentMemory:
     
     def _calculate_learning_metrics(self) -> Dict[str, float]:
         """Calculate learning effectiveness metrics."""
-        if not self.user_preferences:
+        if not self._pref_slots:
             return {"average_confidence": 0.0, "high_confidence_percentage": 0.0}
         
-        confidences = [pref.confidence for pref in self.user_preferences.values()]
-        avg_confidence = sum(confidences) / len(confidences)
-        high_confidence_count = sum(1 for c in confidences if c > 0.7)
+        confidences = self._confidences[:len(self._pref_slots)]
+        total, high_confidence_count = _confidence_stats(confidences, _HIGH_CONFIDENCE)
+        avg_confidence = total / len(confidences)
         high_confidence_percentage = high_confidence_count / len(confidences) * 100
         
         return {
@@ -513,19 +926,33 @@ class PersistentMemory:
     def _count_recent_feedback(self) -> int:
         """Count feedback received in the last 7 days."""
         week_ago = datetime.now() - timedelta(days=7)
-        cursor = self.connection.cursor()
-        cursor.execute("""
-            SELECT COUNT(*) FROM user_feedback 
-            WHERE timestamp > ?
-        """, (week_ago.isoformat(),))
-        
-        return cursor.fetchone()[0]
+        with self._lock:
+            self.flush()
+            cursor = self._cursor
+            cursor.execute("""
+                SELECT COUNT(*) FROM user_feedback 
+                WHERE timestamp > ?
+            """, (week_ago.isoformat(),))
+            
+            return cursor.fetchone()[0]
     
     def close(self):
-        """Close database connection."""
+        """
+        Stop the writer, write any queued rows and close the database
+        connection. Feedback given later is written by the calling thread.
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._write_q.put(None)
+        self._writer.join()
         if self.connection:
+            self.flush()
             self.connection.close()
+            self.connection = None
 
 
 # Global memory instance
-memory = PersistentMemory()
\ No newline at end of file
+memory = PersistentMemory()
+atexit.register(memory.close)
\ No newline at end of file
@@ -7,21 +7,87 @@ and identify areas for improvement in agent systems.
 
 import time
 import json
+import bisect
+import copy
 import logging
-from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+import queue
+import random
+import threading
+from functools import wraps
+from typing import Callable, Dict, List, Any, Optional, Tuple
+from datetime import datetime
 from dataclasses import dataclass, asdict
 from collections import defaultdict, deque
 
+import numpy as np
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Metric kinds recorded by the monitor, stored as small integer ids
+METRIC_NAMES = ("operation_execution_time", "tool_execution_time", "memory_usage")
+METRIC_IDS = {name: metric_id for metric_id, name in enumerate(METRIC_NAMES)}
+_OPERATION, _TOOL, _MEMORY = range(len(METRIC_NAMES))
+
+# Values of the success column
+_FAILED, _SUCCEEDED, _NOT_APPLICABLE = 0, 1, -1
+
+# Fixed 16-byte little-endian record used by export_records
+METRIC_RECORD_DTYPE = np.dtype([
+    ("timestamp_ns", "<i8"),
+    ("agent_id", "<u2"),
+    ("metric_id", "<u2"),
+    ("value", "<f4"),
+])
+
+# Running totals kept per agent, one row per interned agent id
+STATS_DTYPE = np.dtype([
+    ("total_operations", np.int64),
+    ("successful_operations", np.int64),
+    ("failed_operations", np.int64),
+    ("total_execution_time", np.float64),
+])
+
+# A cached report is reused within the same second, unless this many
+# measurements or snapshots have arrived since it was built
+_REPORT_CACHE_BUCKET_NS = 10**9
+_REPORT_CACHE_MAX_CHANGES = 50
+
+# Timestamps are time.monotonic_ns() values; these anchor them to wall time
+_MONITOR_T0 = time.time()
+_BASE_NS = time.monotonic_ns()
+
+
+def _now_ns() -> int:
+    return time.monotonic_ns()
+
+
+def _json_bytes(value: Dict[str, Any]) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value).encode()
+
+
+def _ns_to_datetime(ns: int) -> datetime:
+    """Wall-clock datetime of a monitor timestamp."""
+    return datetime.fromtimestamp(_MONITOR_T0 + (ns - _BASE_NS) / 1e9)
+
 
 @dataclass
 class PerformanceMetric:
     """Represents a single performance metric measurement."""
+    # Declared by hand rather than with dataclass(slots=True), which needs
+    # Python 3.10
+    __slots__ = ('metric_name', 'value', 'timestamp', 'agent_name', 'context')
+    
     metric_name: str
     value: float
-    timestamp: datetime
+    timestamp: int  # time.monotonic_ns()
     agent_name: str
     context: Dict[str, Any]
     
@@ -29,17 +95,24 @@ class PerformanceMetric:
         return {
             "metric_name": self.metric_name,
             "value": self.value,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp": _ns_to_datetime(self.timestamp).isoformat(),
             "agent_name": self.agent_name,
             "context": self.context
         }
+    
+    def to_json_bytes(self) -> bytes:
+        """Serialize to UTF-8 JSON, using orjson when installed."""
+        return _json_bytes(self.to_dict())
 
 
 @dataclass
 class AgentPerformanceSnapshot:
     """Snapshot of agent performance at a point in time."""
+    __slots__ = ('agent_name', 'timestamp', 'metrics', 'memory_usage', 'tool_usage_stats',
+                 'error_count', 'success_rate')
+    
     agent_name: str
-    timestamp: datetime
+    timestamp: int  # time.monotonic_ns()
     metrics: Dict[str, float]
     memory_usage: Dict[str, int]
     tool_usage_stats: Dict[str, int]
@@ -49,13 +122,61 @@ class AgentPerformanceSnapshot:
     def to_dict(self) -> Dict[str, Any]:
         return {
             "agent_name": self.agent_name,
-            "timestamp": self.timestamp.isoformat(),
+            "timestamp": _ns_to_datetime(self.timestamp).isoformat(),
             "metrics": self.metrics,
             "memory_usage": self.memory_usage,
             "tool_usage_stats": self.tool_usage_stats,
             "error_count": self.error_count,
             "success_rate": self.success_rate
         }
+    
+    def to_json_bytes(self) -> bytes:
+        """Serialize to UTF-8 JSON, using orjson when installed."""
+        return _json_bytes(self.to_dict())
+
+
+def _drained(method: Callable) -> Callable:
+    """
+    Run a PerformanceMonitor reader after queued measurements have been
+    applied, holding the monitor lock.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._wait_for_drain()
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _first_seen(ids: np.ndarray) -> np.ndarray:
+    """Distinct values of `ids` in order of first appearance."""
+    _, first = np.unique(ids, return_index=True)
+    return ids[np.sort(first)]
+
+
+def _split_sums(values: np.ndarray, metric_ids: np.ndarray, counts: np.ndarray,
+                metric_id: int) -> Tuple[float, float, float, float]:
+    """
+    Sum of `values` whose metric is `metric_id` in the first and second
+    half of the (time-ordered) measurements, and the number of
+    measurements in each half. Row i stands for counts[i] measurements
+    (an estimate, possibly fractional, for sampled rows).
+    """
+    seen_before = np.cumsum(counts) - counts
+    total = float(counts.sum())
+    # The row that crosses the midpoint goes to the first half
+    split = int(np.searchsorted(seen_before, total // 2, side="left"))
+    first_n = float(counts[:split].sum())
+    matching = np.where(metric_ids == metric_id, values, 0.0)
+    return float(matching[:split].sum()), float(matching[split:].sum()), first_n, total - first_n
+
+
+def _group_sums(group_ids: np.ndarray, values: np.ndarray, counts: np.ndarray,
+                n_groups: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-group value and count sums for ids in range(n_groups)."""
+    sums = np.bincount(group_ids, weights=values, minlength=n_groups)
+    group_counts = np.bincount(group_ids, weights=counts, minlength=n_groups).astype(np.int64)
+    return sums, group_counts
 
 
 class PerformanceMonitor:
@@ -68,25 +189,77 @@ class PerformanceMonitor:
     3. Anomaly detection
     4. Bottleneck identification
     5. Optimization recommendations
+    
+    Metrics are kept column-wise in fixed-size NumPy ring buffers (one array
+    per field) rather than as one object per measurement, so reports filter
+    and aggregate them with vectorized operations. Tool calls are summed per
+    agent, tool and outcome over `flush_interval_ms` windows and stored as
+    one row per window.
+    
+    Recording calls only enqueue the measurement; a background thread
+    applies them to the buffers and statistics, so callers don't pay for
+    the bookkeeping.
     """
     
-    def __init__(self, buffer_size: int = 1000):
+    def __init__(self, buffer_size: int = 1000, flush_interval_ms: int = 1000):
         self.buffer_size = buffer_size
+        self.flush_interval_ns = flush_interval_ms * 10**6
+        
+        # Performance data storage: metric columns, written at _head
+        self._ts = np.zeros(buffer_size, dtype=np.int64)           # time.monotonic_ns()
+        self._val = np.zeros(buffer_size, dtype=np.float64)
+        self._name_id = np.zeros(buffer_size, dtype=np.int8)       # METRIC_IDS
+        self._agent_id = np.zeros(buffer_size, dtype=np.int16)     # _agent_names
+        self._label_id = np.full(buffer_size, -1, dtype=np.int16)  # tool / operation type
+        self._success = np.full(buffer_size, _NOT_APPLICABLE, dtype=np.int8)
+        self._n = np.ones(buffer_size, dtype=np.int32)             # measurements in the row
+        # Context that cannot be rebuilt from the columns (memory stats,
+        # operation results and errors); None for most rows
+        self._extra: List[Optional[Dict[str, Any]]] = [None] * buffer_size
+        self._head = 0
+        self._count = 0
+        
+        # Uniform sample (reservoir sampling) of the rows pushed out of the
+        # ring, so trends over windows longer than the ring still see them
+        self._res_ts = np.zeros(buffer_size, dtype=np.int64)
+        self._res_val = np.zeros(buffer_size, dtype=np.float64)
+        self._res_name_id = np.zeros(buffer_size, dtype=np.int8)
+        self._res_agent_id = np.zeros(buffer_size, dtype=np.int16)
+        self._res_n = np.zeros(buffer_size, dtype=np.int32)
+        self._n_evicted = 0
+        
+        # Interned agent names and labels
+        self._agent_ids: Dict[str, int] = {}
+        self._agent_names: List[str] = []
+        self._label_ids: Dict[str, int] = {}
+        self._labels: List[str] = []
+        
+        # Tool calls of the current window: (agent, tool, success) -> [count, total time]
+        self._pending_tools: Dict[Tuple[str, str, int], List] = {}
+        self._window_start_ns = 0
+        
+        # Report filters specialized per (agent, window length), see _report_filter
+        self._report_filters: Dict[Tuple[Optional[str], int], Callable] = {}
+        
+        # Bumped for every measurement and snapshot; cached reports remember
+        # the value they were built at: (agent, window) -> (bucket, seq, report)
+        self._seq = 0
+        self._report_cache: Dict[Tuple[Optional[str], str], Tuple[int, int, Dict[str, Any]]] = {}
         
-        # Performance data storage
-        self.metrics_buffer: deque = deque(maxlen=buffer_size)
         self.snapshots_buffer: deque = deque(maxlen=buffer_size)
         
-        # Real-time tracking
+        # Per-agent tails: latest memory stats and recent operation end times
+        self._last_memory: Dict[str, Dict[str, int]] = {}
+        self._op_ts_by_agent: Dict[str, deque] = defaultdict(lambda: deque(maxlen=4096))
+        
+        # Real-time tracking: STATS_DTYPE rows and a tool call count matrix,
+        # both indexed by agent id (tools by label id), grown on demand
         self.active_operations: Dict[str, Dict[str, Any]] = {}
-        self.agent_stats: Dict[str, Dict[str, Any]] = defaultdict(lambda: {
-            "total_operations": 0,
-            "successful_operations": 0,
-            "failed_operations": 0,
-            "total_execution_time": 0.0,
-            "tool_usage": defaultdict(int),
-            "error_types": defaultdict(int)
-        })
+        self._stats = np.zeros(8, dtype=STATS_DTYPE)
+        self._tool_counts = np.zeros((8, 16), dtype=np.int32)
+        self._error_types: Dict[int, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        # Agents with statistics, in order of first appearance
+        self._monitored: Dict[str, int] = {}
         
         # Performance thresholds for alerting
         self.thresholds = {
@@ -96,14 +269,272 @@ class PerformanceMonitor:
             "max_error_rate": 0.15       # 15%
         }
         
-        # Trend analysis windows
+        # Trend analysis windows, in nanoseconds
         self.trend_windows = {
-            "short": timedelta(minutes=5),
-            "medium": timedelta(hours=1),
-            "long": timedelta(hours=24)
+            "short": 5 * 60 * 10**9,
+            "medium": 60 * 60 * 10**9,
+            "long": 24 * 60 * 60 * 10**9
+        }
+        
+        # Measurements waiting for the drain thread: (apply method, args),
+        # or None to stop it. Once closed, measurements are applied by the
+        # recording thread; _closed is only read and set under _close_lock.
+        self._lock = threading.RLock()
+        self._ingress: "queue.Queue[Optional[Tuple[Callable, Tuple]]]" = queue.Queue()
+        self._close_lock = threading.Lock()
+        self._closed = False
+        self._drainer = threading.Thread(
+            target=self._drain_loop,
+            name="monitor-drain",
+            daemon=True
+        )
+        self._drainer.start()
+    
+    def _drain_loop(self):
+        """Apply queued measurements, one drained burst per lock hold."""
+        while True:
+            items = [self._ingress.get()]
+            while True:
+                try:
+                    items.append(self._ingress.get_nowait())
+                except queue.Empty:
+                    break
+            
+            stop = False
+            try:
+                with self._lock:
+                    for item in items:
+                        if item is None:
+                            stop = True
+                            continue
+                        self._apply(*item)
+            finally:
+                for _ in items:
+                    self._ingress.task_done()
+            
+            if stop:
+                return
+    
+    def _apply(self, apply: Callable, args: Tuple) -> None:
+        """Apply one measurement; a failure loses only that measurement."""
+        try:
+            apply(*args)
+        except Exception as e:
+            logger.error(f"Failed to record performance metrics: {e}")
+    
+    def _submit(self, apply: Callable, *args) -> None:
+        """Queue a measurement for the drain thread, or apply it now once closed."""
+        with self._close_lock:
+            if not self._closed:
+                self._ingress.put((apply, args))
+                return
+        with self._lock:
+            self._apply(apply, args)
+    
+    def _wait_for_drain(self):
+        """Block until queued measurements have been applied."""
+        if threading.current_thread() is not self._drainer and self._drainer.is_alive():
+            self._ingress.join()
+    
+    def close(self):
+        """
+        Apply any queued measurements and stop the drain thread. Later
+        measurements are applied as they are recorded.
+        """
+        with self._close_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._ingress.put(None)
+        self._drainer.join()
+    
+    def _intern_agent(self, agent_name: str) -> int:
+        agent_id = self._agent_ids.get(agent_name)
+        if agent_id is None:
+            agent_id = self._agent_ids[agent_name] = len(self._agent_names)
+            self._agent_names.append(agent_name)
+        return agent_id
+    
+    def _intern_label(self, label: str) -> int:
+        label_id = self._label_ids.get(label)
+        if label_id is None:
+            label_id = self._label_ids[label] = len(self._labels)
+            self._labels.append(label)
+        return label_id
+    
+    def _stats_id(self, agent_name: str) -> int:
+        """Agent id of `agent_name`, making room for its statistics."""
+        agent_id = self._monitored.get(agent_name)
+        if agent_id is None:
+            agent_id = self._monitored[agent_name] = self._intern_agent(agent_name)
+            if agent_id >= len(self._stats):
+                size = max(agent_id + 1, 2 * len(self._stats))
+                grown = np.zeros(size, dtype=STATS_DTYPE)
+                grown[:len(self._stats)] = self._stats
+                self._stats = grown
+                self._grow_tool_counts(size, self._tool_counts.shape[1])
+        return agent_id
+    
+    def _grow_tool_counts(self, n_agents: int, n_tools: int) -> None:
+        grown = np.zeros((n_agents, n_tools), dtype=np.int32)
+        rows, cols = self._tool_counts.shape
+        grown[:rows, :cols] = self._tool_counts
+        self._tool_counts = grown
+    
+    @property
+    @_drained
+    def agent_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-agent statistics as plain dictionaries."""
+        return {agent_name: self._agent_stats_dict(agent_id) for agent_name, agent_id in self._monitored.items()}
+    
+    def _agent_stats_dict(self, agent_id: int) -> Dict[str, Any]:
+        stats = self._stats[agent_id]
+        return {
+            "total_operations": int(stats["total_operations"]),
+            "successful_operations": int(stats["successful_operations"]),
+            "failed_operations": int(stats["failed_operations"]),
+            "total_execution_time": float(stats["total_execution_time"]),
+            "tool_usage": self._tool_usage(agent_id),
+            "error_types": dict(self._error_types.get(agent_id, {}))
         }
     
-    def start_operation(self, operation_id: str, agent_name: str, 
+    def _tool_usage(self, agent_id: int) -> Dict[str, int]:
+        counts = self._tool_counts[agent_id]
+        return {self._labels[tool_id]: int(counts[tool_id]) for tool_id in np.flatnonzero(counts)}
+    
+    def _record(self, metric_id: int, value: float, agent_name: str,
+                label: Optional[str] = None, success: int = _NOT_APPLICABLE,
+                extra: Optional[Dict[str, Any]] = None, count: int = 1,
+                timestamp_ns: Optional[int] = None) -> int:
+        """
+        Write one metric row, overwriting the oldest when the buffer is full,
+        and return its timestamp (now, unless `timestamp_ns` is given).
+        `value` is the sum of `count` measurements.
+        """
+        slot = self._head
+        if self._count == self.buffer_size:
+            self._sample_evicted(slot)
+        
+        ts = self._ts[slot] = _now_ns() if timestamp_ns is None else timestamp_ns
+        self._val[slot] = value
+        self._name_id[slot] = metric_id
+        self._agent_id[slot] = self._intern_agent(agent_name)
+        self._label_id[slot] = -1 if label is None else self._intern_label(label)
+        self._success[slot] = success
+        self._extra[slot] = extra
+        self._n[slot] = count
+        
+        self._head = (slot + 1) % self.buffer_size
+        if self._count < self.buffer_size:
+            self._count += 1
+        return ts
+    
+    def _sample_evicted(self, slot: int) -> None:
+        """Offer the row about to be overwritten to the reservoir."""
+        seen = self._n_evicted
+        self._n_evicted += 1
+        if seen < self.buffer_size:
+            target = seen
+        else:
+            target = random.randrange(seen + 1)
+            if target >= self.buffer_size:
+                return
+        
+        self._res_ts[target] = self._ts[slot]
+        self._res_val[target] = self._val[slot]
+        self._res_name_id[target] = self._name_id[slot]
+        self._res_agent_id[target] = self._agent_id[slot]
+        self._res_n[target] = self._n[slot]
+    
+    def _sampled_rows(self, cutoff_ns: int, agent_id: Optional[int] = None) -> np.ndarray:
+        """Reservoir rows recorded at or after `cutoff_ns`, optionally for one agent."""
+        rows = np.arange(min(self._n_evicted, self.buffer_size))
+        mask = self._res_ts[rows] >= cutoff_ns
+        if agent_id is not None:
+            mask &= self._res_agent_id[rows] == agent_id
+        return rows[mask]
+    
+    def _flush_tool_usage(self) -> None:
+        """
+        Write the current window's tool calls to the buffer, stamped with the
+        time the window started rather than the time of the flush.
+        """
+        pending, self._pending_tools = self._pending_tools, {}
+        for (agent_name, tool_name, success), (count, total) in pending.items():
+            self._record(_TOOL, total, agent_name, label=tool_name, success=success,
+                         count=count, timestamp_ns=self._window_start_ns)
+    
+    def _ordered_slots(self) -> np.ndarray:
+        """Buffer slots holding metrics, in the order written."""
+        if self._count < self.buffer_size:
+            return np.arange(self._count)
+        return np.concatenate((np.arange(self._head, self.buffer_size), np.arange(self._head)))
+    
+    def _window_slots(self, cutoff_ns: int) -> np.ndarray:
+        """Slots with timestamps at or after `cutoff_ns`, in the order written."""
+        self._flush_tool_usage()
+        slots = self._ordered_slots()
+        # A tool window is written after rows that arrived while it was
+        # open, with its start time, so timestamps are not sorted by slot
+        return slots[self._ts[slots] >= cutoff_ns]
+    
+    def _metric_at(self, slot: int) -> PerformanceMetric:
+        """Rebuild the PerformanceMetric stored in a slot."""
+        metric_id = int(self._name_id[slot])
+        label = self._labels[self._label_id[slot]] if self._label_id[slot] >= 0 else None
+        extra = self._extra[slot]
+        
+        if metric_id == _OPERATION:
+            context = {
+                "operation_type": label,
+                "success": bool(self._success[slot] == _SUCCEEDED),
+                "result_data": (extra or {}).get("result_data") or {},
+                "error_info": (extra or {}).get("error_info")
+            }
+        elif metric_id == _TOOL:
+            context = {"tool_name": label, "success": bool(self._success[slot] == _SUCCEEDED)}
+            if self._n[slot] > 1:
+                context["count"] = int(self._n[slot])
+        else:
+            context = extra
+        
+        return PerformanceMetric(
+            metric_name=METRIC_NAMES[metric_id],
+            value=float(self._val[slot]) / int(self._n[slot]),
+            timestamp=int(self._ts[slot]),
+            agent_name=self._agent_names[self._agent_id[slot]],
+            context=context
+        )
+    
+    @property
+    @_drained
+    def metrics_buffer(self) -> List[PerformanceMetric]:
+        """
+        Buffered metrics as PerformanceMetric objects, in the order written.
+        A tool row's value is the mean over the calls it aggregates.
+        """
+        self._flush_tool_usage()
+        return [self._metric_at(slot) for slot in self._ordered_slots()]
+    
+    @_drained
+    def export_records(self) -> Tuple[bytes, List[str]]:
+        """
+        Buffered metrics as packed METRIC_RECORD_DTYPE records, in the order
+        written, and the agent names that `agent_id` indexes. Tool rows carry
+        the mean of the calls they aggregate. Consumers can read the bytes
+        back with np.frombuffer(data, dtype=METRIC_RECORD_DTYPE).
+        """
+        self._flush_tool_usage()
+        slots = self._ordered_slots()
+        
+        records = np.empty(len(slots), dtype=METRIC_RECORD_DTYPE)
+        records["timestamp_ns"] = self._ts[slots]
+        records["agent_id"] = self._agent_id[slots]
+        records["metric_id"] = self._name_id[slots]
+        records["value"] = self._val[slots] / self._n[slots]
+        return records.tobytes(), list(self._agent_names)
+    
+    def start_operation(self, operation_id: str, agent_name: str,
                        operation_type: str, context: Dict[str, Any] = None) -> None:
         """Start tracking a new operation."""
         self.active_operations[operation_id] = {
@@ -115,23 +546,39 @@ class PerformanceMonitor:
         
         logger.debug(f"Started tracking operation {operation_id} for agent {agent_name}")
     
-    def end_operation(self, operation_id: str, success: bool, 
-                     result_data: Dict[str, Any] = None, 
+    def end_operation(self, operation_id: str, success: bool,
+                     result_data: Dict[str, Any] = None,
                      error_info: str = None) -> None:
         """End tracking an operation and record metrics."""
-        if operation_id not in self.active_operations:
+        operation = self.active_operations.pop(operation_id, None)
+        if operation is None:
             logger.warning(f"Operation {operation_id} not found in active operations")
             return
         
-        operation = self.active_operations.pop(operation_id)
         end_time = time.time()
         execution_time = end_time - operation["start_time"]
         
-        agent_name = operation["agent_name"]
-        operation_type = operation["operation_type"]
+        self._submit(
+            self._apply_operation,
+            operation["agent_name"],
+            operation["operation_type"],
+            execution_time,
+            success,
+            result_data,
+            error_info
+        )
+        
+        logger.debug(f"Completed operation {operation_id}: {execution_time:.2f}s, success={success}")
+    
+    def _apply_operation(self, agent_name: str, operation_type: str, execution_time: float,
+                         success: bool, result_data: Optional[Dict[str, Any]],
+                         error_info: Optional[str]) -> None:
+        """Update statistics and metrics for a finished operation (drain thread)."""
+        self._seq += 1
         
         # Update agent statistics
-        stats = self.agent_stats[agent_name]
+        agent_id = self._stats_id(agent_name)
+        stats = self._stats[agent_id]
         stats["total_operations"] += 1
         stats["total_execution_time"] += execution_time
         
@@ -140,78 +587,84 @@ class PerformanceMonitor:
         else:
             stats["failed_operations"] += 1
             if error_info:
-                stats["error_types"][error_info] += 1
+                self._error_types[agent_id][error_info] += 1
         
         # Record performance metric
-        metric = PerformanceMetric(
-            metric_name="operation_execution_time",
-            value=execution_time,
-            timestamp=datetime.now(),
-            agent_name=agent_name,
-            context={
-                "operation_type": operation_type,
-                "success": success,
-                "result_data": result_data or {},
-                "error_info": error_info
-            }
+        extra = None
+        if result_data or error_info:
+            extra = {"result_data": result_data, "error_info": error_info}
+        op_ts = self._record(
+            _OPERATION,
+            execution_time,
+            agent_name,
+            label=operation_type,
+            success=_SUCCEEDED if success else _FAILED,
+            extra=extra
         )
-        
-        self.metrics_buffer.append(metric)
+        self._op_ts_by_agent[agent_name].append(op_ts)
         
         # Check for performance issues
         self._check_performance_thresholds(agent_name, execution_time, success)
-        
-        logger.debug(f"Completed operation {operation_id}: {execution_time:.2f}s, success={success}")
     
-    def record_tool_usage(self, agent_name: str, tool_name: str, 
+    def record_tool_usage(self, agent_name: str, tool_name: str,
                          execution_time: float, success: bool) -> None:
         """Record tool usage statistics."""
-        stats = self.agent_stats[agent_name]
-        stats["tool_usage"][tool_name] += 1
-        
-        # Record tool-specific metric
-        metric = PerformanceMetric(
-            metric_name="tool_execution_time",
-            value=execution_time,
-            timestamp=datetime.now(),
-            agent_name=agent_name,
-            context={
-                "tool_name": tool_name,
-                "success": success
-            }
-        )
-        
-        self.metrics_buffer.append(metric)
+        self._submit(self._apply_tool_usage, agent_name, tool_name, execution_time, success)
+    
+    def _apply_tool_usage(self, agent_name: str, tool_name: str,
+                          execution_time: float, success: bool) -> None:
+        """Count a tool call and add it to the current window (drain thread)."""
+        self._seq += 1
+        agent_id = self._stats_id(agent_name)
+        tool_id = self._intern_label(tool_name)
+        if tool_id >= self._tool_counts.shape[1]:
+            self._grow_tool_counts(len(self._stats), max(tool_id + 1, 2 * self._tool_counts.shape[1]))
+        self._tool_counts[agent_id, tool_id] += 1
+        
+        # Add to the tool-specific metric of the current window
+        now = _now_ns()
+        if self._pending_tools and now - self._window_start_ns >= self.flush_interval_ns:
+            self._flush_tool_usage()
+        if not self._pending_tools:
+            self._window_start_ns = now
+        
+        key = (agent_name, tool_name, _SUCCEEDED if success else _FAILED)
+        bucket = self._pending_tools.get(key)
+        if bucket is None:
+            self._pending_tools[key] = [1, execution_time]
+        else:
+            bucket[0] += 1
+            bucket[1] += execution_time
     
     def record_memory_usage(self, agent_name: str, memory_stats: Dict[str, int]) -> None:
         """Record memory usage statistics."""
+        self._submit(self._apply_memory_usage, agent_name, memory_stats)
+    
+    def _apply_memory_usage(self, agent_name: str, memory_stats: Dict[str, int]) -> None:
+        """Store a memory reading (drain thread)."""
+        self._seq += 1
         total_memory = sum(memory_stats.values())
         
-        metric = PerformanceMetric(
-            metric_name="memory_usage",
-            value=total_memory,
-            timestamp=datetime.now(),
-            agent_name=agent_name,
-            context=memory_stats
-        )
-        
-        self.metrics_buffer.append(metric)
+        self._record(_MEMORY, total_memory, agent_name, extra=memory_stats)
+        self._last_memory[agent_name] = memory_stats
         
         # Check memory threshold
         if total_memory > self.thresholds["max_memory_usage"]:
             logger.warning(f"High memory usage for agent {agent_name}: {total_memory}MB")
     
-    def take_performance_snapshot(self, agent_name: str, 
+    @_drained
+    def take_performance_snapshot(self, agent_name: str,
                                 additional_metrics: Dict[str, float] = None) -> AgentPerformanceSnapshot:
         """Take a comprehensive performance snapshot of an agent."""
-        stats = self.agent_stats[agent_name]
+        agent_id = self._stats_id(agent_name)
+        stats = self._stats[agent_id]
         
         # Calculate success rate
-        total_ops = stats["total_operations"]
-        success_rate = (stats["successful_operations"] / total_ops) if total_ops > 0 else 1.0
+        total_ops = int(stats["total_operations"])
+        success_rate = (int(stats["successful_operations"]) / total_ops) if total_ops > 0 else 1.0
         
         # Calculate average execution time
-        avg_execution_time = (stats["total_execution_time"] / total_ops) if total_ops > 0 else 0.0
+        avg_execution_time = (float(stats["total_execution_time"]) / total_ops) if total_ops > 0 else 0.0
         
         # Get recent memory usage
         recent_memory = self._get_recent_memory_usage(agent_name)
@@ -229,52 +682,101 @@ class PerformanceMonitor:
         
         snapshot = AgentPerformanceSnapshot(
             agent_name=agent_name,
-            timestamp=datetime.now(),
+            timestamp=_now_ns(),
             metrics=metrics,
             memory_usage=recent_memory,
-            tool_usage_stats=dict(stats["tool_usage"]),
-            error_count=stats["failed_operations"],
+            tool_usage_stats=self._tool_usage(agent_id),
+            error_count=int(stats["failed_operations"]),
             success_rate=success_rate
         )
         
         self.snapshots_buffer.append(snapshot)
+        self._seq += 1
         return snapshot
     
-    def get_performance_report(self, agent_name: str = None, 
+    @_drained
+    def get_performance_report(self, agent_name: str = None,
                              time_window: str = "medium") -> Dict[str, Any]:
         """Generate comprehensive performance report."""
+        key = (agent_name, time_window)
+        bucket = _now_ns() // _REPORT_CACHE_BUCKET_NS
+        cached = self._report_cache.get(key)
+        if cached is not None and cached[0] == bucket and self._seq - cached[1] < _REPORT_CACHE_MAX_CHANGES:
+            return copy.deepcopy(cached[2])
+        
         window_delta = self.trend_windows.get(time_window, self.trend_windows["medium"])
-        cutoff_time = datetime.now() - window_delta
-        
-        # Filter metrics by time window and agent
-        relevant_metrics = [
-            metric for metric in self.metrics_buffer
-            if metric.timestamp >= cutoff_time and 
-            (agent_name is None or metric.agent_name == agent_name)
-        ]
-        
-        # Filter snapshots
-        relevant_snapshots = [
-            snapshot for snapshot in self.snapshots_buffer
-            if snapshot.timestamp >= cutoff_time and
-            (agent_name is None or snapshot.agent_name == agent_name)
-        ]
+        
+        # Filter metrics, sampled older metrics and snapshots by time window
+        # and agent
+        relevant_slots, sampled_rows, relevant_snapshots = self._report_filter(agent_name, window_delta)()
         
         # Calculate aggregated statistics
         report = {
             "time_window": time_window,
             "report_generated": datetime.now().isoformat(),
-            "metrics_analyzed": len(relevant_metrics),
+            "metrics_analyzed": int(self._n[relevant_slots].sum()),
             "snapshots_analyzed": len(relevant_snapshots),
-            "agent_performance": self._analyze_agent_performance(relevant_metrics, relevant_snapshots),
-            "trends": self._analyze_trends(relevant_metrics),
-            "bottlenecks": self._identify_bottlenecks(relevant_metrics),
-            "recommendations": self._generate_recommendations(relevant_metrics, relevant_snapshots)
+            "agent_performance": self._analyze_agent_performance(relevant_slots, relevant_snapshots),
+            "trends": self._analyze_trends(relevant_slots, sampled_rows),
+            "bottlenecks": self._identify_bottlenecks(relevant_slots),
+            "recommendations": self._generate_recommendations(relevant_slots, relevant_snapshots)
         }
         
-        return report
+        self._report_cache[key] = (bucket, self._seq, report)
+        return copy.deepcopy(report)
     
-    def _check_performance_thresholds(self, agent_name: str, execution_time: float, 
+    def _report_filter(self, agent_name: Optional[str], window_ns: int) -> Callable[
+            [], Tuple[np.ndarray, np.ndarray, List[AgentPerformanceSnapshot]]]:
+        """
+        Filter selecting the metric slots, reservoir rows and snapshots of
+        one agent (or all agents) within the last `window_ns`, built once
+        per pair with the agent id and window bound as constants.
+        """
+        key = (agent_name, window_ns)
+        report_filter = self._report_filters.get(key)
+        if report_filter is not None:
+            return report_filter
+        
+        agent_id = self._agent_ids.get(agent_name)
+        snapshots = self.snapshots_buffer
+        
+        def recent_snapshots(cutoff_ns: int) -> List[AgentPerformanceSnapshot]:
+            # Snapshots are appended in timestamp order; stop at the first
+            # one older than the window
+            selected = []
+            for snapshot in reversed(snapshots):
+                if snapshot.timestamp < cutoff_ns:
+                    break
+                if agent_name is None or snapshot.agent_name == agent_name:
+                    selected.append(snapshot)
+            selected.reverse()
+            return selected
+        
+        if agent_name is None:
+            def report_filter():
+                cutoff_ns = _now_ns() - window_ns
+                return self._window_slots(cutoff_ns), self._sampled_rows(cutoff_ns), recent_snapshots(cutoff_ns)
+        elif agent_id is None:
+            # No metrics from this agent yet, so its id may still change;
+            # don't cache
+            def no_metrics():
+                cutoff_ns = _now_ns() - window_ns
+                return np.arange(0), np.arange(0), recent_snapshots(cutoff_ns)
+            return no_metrics
+        else:
+            def report_filter():
+                cutoff_ns = _now_ns() - window_ns
+                slots = self._window_slots(cutoff_ns)
+                return (
+                    slots[self._agent_id[slots] == agent_id],
+                    self._sampled_rows(cutoff_ns, agent_id),
+                    recent_snapshots(cutoff_ns)
+                )
+        
+        self._report_filters[key] = report_filter
+        return report_filter
+    
+    def _check_performance_thresholds(self, agent_name: str, execution_time: float,
                                     success: bool) -> None:
         """Check if performance thresholds are exceeded."""
         # Check execution time
@@ -282,7 +784,7 @@ class PerformanceMonitor:
             logger.warning(f"Slow operation for agent {agent_name}: {execution_time:.2f}s")
         
         # Check success rate
-        stats = self.agent_stats[agent_name]
+        stats = self._stats[self._stats_id(agent_name)]
         total_ops = stats["total_operations"]
         if total_ops >= 10:  # Only check after sufficient operations
             success_rate = stats["successful_operations"] / total_ops
@@ -291,79 +793,71 @@ class PerformanceMonitor:
     
     def _get_recent_memory_usage(self, agent_name: str) -> Dict[str, int]:
         """Get most recent memory usage for an agent."""
-        recent_memory_metrics = [
-            metric for metric in reversed(self.metrics_buffer)
-            if (metric.agent_name == agent_name and 
-                metric.metric_name == "memory_usage")
-        ]
-        
-        if recent_memory_metrics:
-            return recent_memory_metrics[0].context
-        
-        return {"total": 0}
+        return self._last_memory.get(agent_name, {"total": 0})
     
     def _calculate_operations_per_minute(self, agent_name: str) -> float:
         """Calculate operations per minute for an agent."""
-        now = datetime.now()
-        minute_ago = now - timedelta(minutes=1)
-        
-        recent_operations = [
-            metric for metric in self.metrics_buffer
-            if (metric.agent_name == agent_name and 
-                metric.timestamp >= minute_ago and
-                metric.metric_name == "operation_execution_time")
-        ]
+        minute_ago_ns = _now_ns() - 60 * 10**9
         
-        return len(recent_operations)
+        op_times = self._op_ts_by_agent.get(agent_name)
+        if not op_times:
+            return 0
+        return len(op_times) - bisect.bisect_left(op_times, minute_ago_ns)
     
-    def _analyze_agent_performance(self, metrics: List[PerformanceMetric], 
+    def _analyze_agent_performance(self, slots: np.ndarray,
                                  snapshots: List[AgentPerformanceSnapshot]) -> Dict[str, Any]:
         """Analyze overall agent performance."""
-        if not metrics and not snapshots:
+        if not len(slots) and not snapshots:
             return {"status": "no_data"}
         
-        # Group metrics by agent
-        agent_metrics = defaultdict(list)
-        for metric in metrics:
-            agent_metrics[metric.agent_name].append(metric)
+        agent_ids = self._agent_id[slots]
+        is_operation = self._name_id[slots] == _OPERATION
+        values = self._val[slots]
+        succeeded = np.where(self._success[slots] == _SUCCEEDED, self._n[slots], 0)
         
         performance_by_agent = {}
         
-        for agent_name, agent_metric_list in agent_metrics.items():
+        for agent_id in _first_seen(agent_ids):
             # Calculate performance statistics
-            execution_times = [
-                m.value for m in agent_metric_list 
-                if m.metric_name == "operation_execution_time"
-            ]
+            of_agent = agent_ids == agent_id
+            execution_times = values[of_agent & is_operation]
             
-            if execution_times:
-                performance_by_agent[agent_name] = {
-                    "total_operations": len(execution_times),
-                    "average_execution_time": sum(execution_times) / len(execution_times),
-                    "min_execution_time": min(execution_times),
-                    "max_execution_time": max(execution_times),
-                    "success_rate": len([m for m in agent_metric_list 
-                                       if m.context.get("success", False)]) / len(execution_times)
+            if execution_times.size:
+                performance_by_agent[self._agent_names[agent_id]] = {
+                    "total_operations": int(execution_times.size),
+                    "average_execution_time": float(execution_times.mean()),
+                    "min_execution_time": float(execution_times.min()),
+                    "max_execution_time": float(execution_times.max()),
+                    "success_rate": int(succeeded[of_agent].sum()) / execution_times.size
                 }
         
         return performance_by_agent
     
-    def _analyze_trends(self, metrics: List[PerformanceMetric]) -> Dict[str, Any]:
-        """Analyze performance trends over time."""
-        if len(metrics) < 10:
+    def _analyze_trends(self, slots: np.ndarray, sampled_rows: np.ndarray) -> Dict[str, Any]:
+        """
+        Analyze performance trends over time. Rows sampled from before the
+        ring are scaled up to stand for all the evicted rows.
+        """
+        scale = self._n_evicted / min(self._n_evicted, self.buffer_size) if len(sampled_rows) else 0.0
+        timestamps = np.concatenate((self._res_ts[sampled_rows], self._ts[slots]))
+        values = np.concatenate((self._res_val[sampled_rows] * scale, self._val[slots]))
+        metric_ids = np.concatenate((self._res_name_id[sampled_rows], self._name_id[slots]))
+        counts = np.concatenate((self._res_n[sampled_rows] * scale, self._n[slots].astype(np.float64)))
+        
+        if counts.sum() < 10:
             return {"status": "insufficient_data"}
         
         # Sort metrics by timestamp
-        sorted_metrics = sorted(metrics, key=lambda m: m.timestamp)
-        
-        # Split into two halves for trend analysis
-        mid_point = len(sorted_metrics) // 2
-        first_half = sorted_metrics[:mid_point]
-        second_half = sorted_metrics[mid_point:]
+        order = np.argsort(timestamps, kind="stable")
         
-        # Calculate average execution times
-        first_avg = sum(m.value for m in first_half if m.metric_name == "operation_execution_time") / len(first_half)
-        second_avg = sum(m.value for m in second_half if m.metric_name == "operation_execution_time") / len(second_half)
+        # Split into two halves for trend analysis and calculate average
+        # execution times
+        first_sum, second_sum, first_n, second_n = _split_sums(
+            values[order], metric_ids[order], counts[order], _OPERATION
+        )
+        # A half can be empty when one aggregated row holds most measurements
+        first_avg = first_sum / first_n if first_n else 0.0
+        second_avg = second_sum / second_n if second_n else 0.0
         
         trend_direction = "improving" if second_avg < first_avg else "degrading"
         trend_magnitude = abs(second_avg - first_avg) / first_avg if first_avg > 0 else 0
@@ -377,76 +871,80 @@ class PerformanceMonitor:
             }
         }
     
-    def _identify_bottlenecks(self, metrics: List[PerformanceMetric]) -> List[Dict[str, Any]]:
+    def _tool_totals(self, slots: np.ndarray):
+        """Per-tool (label ids, call counts, summed times), in order of first use."""
+        tool_slots = slots[self._name_id[slots] == _TOOL]
+        label_ids = self._label_id[tool_slots]
+        if not label_ids.size:
+            return label_ids, label_ids, self._val[tool_slots]
+        
+        sums, counts = _group_sums(label_ids, self._val[tool_slots], self._n[tool_slots], len(self._labels))
+        order = _first_seen(label_ids)
+        return order, counts[order], sums[order]
+    
+    def _identify_bottlenecks(self, slots: np.ndarray) -> List[Dict[str, Any]]:
         """Identify performance bottlenecks."""
         bottlenecks = []
         
         # Group by tool usage
-        tool_metrics = defaultdict(list)
-        for metric in metrics:
-            if metric.metric_name == "tool_execution_time":
-                tool_name = metric.context.get("tool_name", "unknown")
-                tool_metrics[tool_name].append(metric.value)
+        label_ids, counts, sums = self._tool_totals(slots)
         
         # Find slow tools
-        for tool_name, execution_times in tool_metrics.items():
-            if execution_times:
-                avg_time = sum(execution_times) / len(execution_times)
-                if avg_time > 5.0:  # Tools taking more than 5 seconds on average
-                    bottlenecks.append({
-                        "type": "slow_tool",
-                        "tool_name": tool_name,
-                        "average_execution_time": avg_time,
-                        "usage_count": len(execution_times)
-                    })
+        for label_id, count, total in zip(label_ids, counts, sums):
+            avg_time = float(total) / int(count)
+            if avg_time > 5.0:  # Tools taking more than 5 seconds on average
+                bottlenecks.append({
+                    "type": "slow_tool",
+                    "tool_name": self._labels[label_id],
+                    "average_execution_time": avg_time,
+                    "usage_count": int(count)
+                })
         
         return bottlenecks
     
-    def _generate_recommendations(self, metrics: List[PerformanceMetric], 
+    def _generate_recommendations(self, slots: np.ndarray,
                                 snapshots: List[AgentPerformanceSnapshot]) -> List[str]:
         """Generate optimization recommendations."""
         recommendations = []
         
-        if not metrics:
+        if not len(slots):
             return ["Insufficient data for recommendations"]
         
         # Analyze execution times
-        execution_times = [m.value for m in metrics if m.metric_name == "operation_execution_time"]
-        if execution_times:
-            avg_time = sum(execution_times) / len(execution_times)
+        execution_times = self._val[slots][self._name_id[slots] == _OPERATION]
+        if execution_times.size:
+            avg_time = float(execution_times.mean())
             if avg_time > 10.0:
                 recommendations.append("Consider optimizing slow operations or implementing caching")
         
         # Analyze tool usage
-        tool_usage = defaultdict(int)
-        for metric in metrics:
-            if metric.metric_name == "tool_execution_time":
-                tool_name = metric.context.get("tool_name", "unknown")
-                tool_usage[tool_name] += 1
-        
-        if tool_usage:
-            most_used_tool = max(tool_usage, key=tool_usage.get)
+        label_ids, counts, _ = self._tool_totals(slots)
+        if label_ids.size:
+            most_used_tool = self._labels[label_ids[int(np.argmax(counts))]]
             recommendations.append(f"Most used tool is '{most_used_tool}' - consider optimizing it")
         
         # Analyze error patterns
-        error_count = len([m for m in metrics if not m.context.get("success", True)])
-        if error_count > len(metrics) * 0.1:  # More than 10% errors
+        counts = self._n[slots]
+        error_count = int(counts[self._success[slots] == _FAILED].sum())
+        if error_count > counts.sum() * 0.1:  # More than 10% errors
             recommendations.append("High error rate detected - review error handling and robustness")
         
         return recommendations or ["Performance is within acceptable ranges"]
     
+    @_drained
     def get_real_time_stats(self) -> Dict[str, Any]:
         """Get real-time performance statistics."""
+        self._flush_tool_usage()
         return {
             "active_operations": len(self.active_operations),
-            "total_metrics_collected": len(self.metrics_buffer),
-            "agents_monitored": len(self.agent_stats),
+            "total_metrics_collected": self._count,
+            "agents_monitored": len(self._monitored),
             "recent_operations": {
-                agent: stats["total_operations"] 
-                for agent, stats in self.agent_stats.items()
+                agent: int(self._stats[agent_id]["total_operations"])
+                for agent, agent_id in self._monitored.items()
             }
         }
 
 
 # Global performance monitor instance
-performance_monitor = PerformanceMonitor()
\ No newline at end of file
+performance_monitor = PerformanceMonitor()
@@ -1,21 +1,104 @@
 """Email tools that agents can use to interact with email systems."""
 
+import atexit
 import imaplib
 import email
+import json
 import smtplib
 import logging
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+import re
+import threading
+from email import policy
+from email.message import EmailMessage as MIMEMessage
+from email.parser import BytesParser
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from dataclasses import dataclass
+from functools import cached_property
 from bs4 import BeautifulSoup
 
-from ..config.settings import settings
+from ..config.settings import get_settings
+from .imap_pool import get_imap_pool
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
 
+def _quote(text: str) -> str:
+    """Encode text as an IMAP quoted string."""
+    text = text.replace('\r', ' ').replace('\n', ' ')
+    return '"' + text.replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _last_ids(id_list: bytes, limit: int) -> List[bytes]:
+    """
+    The last `limit` ids of a space-separated SEARCH result, without
+    splitting the ids that are not needed.
+    """
+    if limit <= 0:
+        return id_list.split()
+    return id_list.rsplit(None, limit)[-limit:]
+
+
+def _first_ids(id_list: bytes, limit: int) -> List[bytes]:
+    """The first `limit` ids of a space-separated SORT result; all when limit <= 0."""
+    if limit <= 0:
+        return id_list.split()
+    return id_list.split(None, limit)[:limit]
+
+
+def _part_text(part) -> str:
+    """Decoded text of a MIME part, using its declared charset when known."""
+    try:
+        return part.get_content()
+    except (LookupError, UnicodeError):
+        payload = part.get_payload(decode=True) or b""
+        return payload.decode('utf-8', errors='ignore')
+
+
+_PARSER = BytesParser(policy=policy.default)
+
+_UID_RE = re.compile(rb'UID (\d+)')
+
+
+def _fetch_records(msg_data: List[Any]) -> List[List[Optional[bytes]]]:
+    """
+    [sequence number, UID or None, raw message] for each message of a FETCH
+    response. Message parts come back as (b'<seq> (<items> {size}', raw)
+    tuples followed by closing lines, which hold any items the server put
+    after the literal (such as UID).
+    """
+    records = []
+    for part in msg_data:
+        if isinstance(part, tuple):
+            uid = _UID_RE.search(part[0])
+            records.append([part[0].partition(b' ')[0], uid and uid.group(1), part[1]])
+        elif records and records[-1][1] is None and isinstance(part, bytes):
+            uid = _UID_RE.search(part)
+            if uid:
+                records[-1][1] = uid.group(1)
+    return records
+
+
+def _html_to_text(html: str) -> str:
+    """Extract the visible text of an HTML body, using selectolax when installed."""
+    if SELECTOLAX_AVAILABLE:
+        root = LexborHTMLParser(html).body
+        return root.text(separator=' ', strip=True) if root is not None else ""
+    return BeautifulSoup(html, 'html.parser').get_text()
+
+
 @dataclass
 class EmailMessage:
     """Represents an email message with parsed content."""
@@ -30,6 +113,49 @@ class EmailMessage:
     is_read: bool
     is_important: bool
     attachments: List[str]
+    # IMAP UID, which unlike the sequence number in `id` stays valid after
+    # other messages are expunged; set for search results
+    uid: Optional[str] = None
+    
+    # Memoized lowercase views shared by every tool that scans this message,
+    # and the fields each one is derived from
+    _LOWER_CACHE_DEPENDENCIES = {
+        "subject": ("subject_lower", "text_lower"),
+        "body": ("body_lower", "text_lower"),
+        "sender": ("sender_lower", "sender_addr"),
+    }
+    
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        # Drop cached views when the text they were derived from changes
+        for cached in self._LOWER_CACHE_DEPENDENCIES.get(name, ()):
+            self.__dict__.pop(cached, None)
+    
+    @cached_property
+    def subject_lower(self) -> str:
+        return self.subject.lower()
+    
+    @cached_property
+    def body_lower(self) -> str:
+        return self.body.lower()
+    
+    @cached_property
+    def sender_lower(self) -> str:
+        return self.sender.lower()
+    
+    @cached_property
+    def sender_addr(self) -> str:
+        """Bare lowercased address from a "Name <addr>" or plain sender."""
+        sender = self.sender_lower.strip()
+        _, bracket, rest = sender.partition("<")
+        if bracket:
+            return rest.partition(">")[0]
+        return sender
+    
+    @cached_property
+    def text_lower(self) -> str:
+        """Lowercased "subject body" text used by keyword scans."""
+        return f"{self.subject_lower} {self.body_lower}"
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
@@ -44,90 +170,43 @@ class EmailMessage:
             "labels": self.labels,
             "is_read": self.is_read,
             "is_important": self.is_important,
-            "attachments": self.attachments
+            "attachments": self.attachments,
+            "uid": self.uid
         }
-
-
-class EmailConnection:
-    """Manages email connection and basic operations."""
     
-    def __init__(self):
-        self.imap_conn = None
-        self.smtp_conn = None
-        self.is_connected = False
-    
-    def connect(self) -> bool:
-        """Establish connection to email server."""
-        try:
-            # IMAP connection for reading
-            self.imap_conn = imaplib.IMAP4_SSL(settings.imap_server, settings.imap_port)
-            self.imap_conn.login(settings.email_address, settings.email_password)
-            
-            # SMTP connection for sending (we'll set this up when needed)
-            self.is_connected = True
-            logger.info("Email connection established")
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to connect to email: {e}")
-            return False
-    
-    def disconnect(self):
-        """Close email connections."""
-        if self.imap_conn:
-            self.imap_conn.close()
-            self.imap_conn.logout()
-        if self.smtp_conn:
-            self.smtp_conn.quit()
-        self.is_connected = False
-        logger.info("Email connection closed")
-    
-    def select_folder(self, folder: str = "INBOX") -> bool:
-        """Select email folder."""
-        if not self.is_connected:
-            return False
-        
-        try:
-            status, _ = self.imap_conn.select(folder)
-            return status == 'OK'
-        except Exception as e:
-            logger.error(f"Failed to select folder {folder}: {e}")
-            return False
+    def to_json_bytes(self) -> bytes:
+        """Serialize to UTF-8 JSON, using orjson when installed."""
+        if ORJSON_AVAILABLE:
+            return orjson.dumps(self.to_dict())
+        return json.dumps(self.to_dict()).encode()
 
 
 class EmailTools:
     """Collection of email-related tools for agents."""
     
     def __init__(self):
-        self.connection = EmailConnection()
+        # Logged-in SMTP session kept between sends
+        self._smtp: Optional[smtplib.SMTP_SSL] = None
+        self._smtp_lock = threading.Lock()
     
     def fetch_recent_emails(self, limit: int = 20, folder: str = "INBOX") -> List[EmailMessage]:
         """
         Tool: Fetch recent emails from inbox.
         This is a core perception tool for email agents.
         """
-        if not self.connection.connect():
-            return []
-        
         try:
-            if not self.connection.select_folder(folder):
-                return []
-            
-            # Search for recent emails
-            status, messages = self.connection.imap_conn.search(None, 'ALL')
-            if status != 'OK':
-                return []
-            
-            email_ids = messages[0].split()
-            
-            # Get most recent emails
-            recent_ids = email_ids[-limit:] if len(email_ids) > limit else email_ids
-            emails = []
-            
-            for email_id in reversed(recent_ids):  # Most recent first
-                email_msg = self._fetch_email_by_id(email_id.decode())
-                if email_msg:
-                    emails.append(email_msg)
+            with get_imap_pool().acquire() as conn:
+                if not self._select_folder(conn, folder):
+                    return []
+                
+                # Search for recent emails
+                status, messages = conn.search(None, 'ALL')
+                if status != 'OK':
+                    return []
+                
+                # Get most recent emails
+                recent_ids = _last_ids(messages[0], limit)
+                emails = self._fetch_emails(conn, recent_ids)
             
             logger.info(f"Fetched {len(emails)} recent emails")
             return emails
@@ -135,35 +214,37 @@ class EmailTools:
         except Exception as e:
             logger.error(f"Failed to fetch emails: {e}")
             return []
-        finally:
-            self.connection.disconnect()
     
-    def search_emails(self, query: str, limit: int = 50) -> List[EmailMessage]:
+    def search_emails(self, query: str, limit: int = 50, headers_only: bool = False) -> List[EmailMessage]:
         """
         Tool: Search emails by subject, sender, or content.
+        With headers_only, only the message headers are downloaded and the
+        results have empty bodies; see load_bodies. Results carry their UID.
         """
-        if not self.connection.connect():
-            return []
-        
         try:
-            if not self.connection.select_folder():
-                return []
-            
-            # Convert query to IMAP search format
-            search_criteria = f'(OR SUBJECT "{query}" FROM "{query}")'
-            status, messages = self.connection.imap_conn.search(None, search_criteria)
-            
-            if status != 'OK':
-                return []
-            
-            email_ids = messages[0].split()
-            recent_ids = email_ids[-limit:] if len(email_ids) > limit else email_ids
-            
-            emails = []
-            for email_id in reversed(recent_ids):
-                email_msg = self._fetch_email_by_id(email_id.decode())
-                if email_msg:
-                    emails.append(email_msg)
+            with get_imap_pool().acquire() as conn:
+                if not self._select_folder(conn):
+                    return []
+                
+                # Convert query to IMAP search format
+                quoted = _quote(query)
+                search_criteria = ('OR', 'SUBJECT', quoted, 'FROM', quoted)
+                
+                # Search by UID, so the results can be fetched again later
+                # (load_bodies) even if messages are expunged in between
+                if 'SORT' in conn.capabilities:
+                    # Let the server order matches newest first
+                    status, messages = conn.uid('SORT', '(REVERSE ARRIVAL)', 'UTF-8', *search_criteria)
+                    if status != 'OK':
+                        return []
+                    recent_uids = _first_ids(messages[0], limit)[::-1]
+                else:
+                    status, messages = conn.uid('SEARCH', None, *search_criteria)
+                    if status != 'OK':
+                        return []
+                    recent_uids = _last_ids(messages[0], limit)
+                
+                emails = self._fetch_emails(conn, recent_uids, headers_only, by_uid=True)
             
             logger.info(f"Found {len(emails)} emails matching query: {query}")
             return emails
@@ -171,29 +252,53 @@ class EmailTools:
         except Exception as e:
             logger.error(f"Email search failed: {e}")
             return []
-        finally:
-            self.connection.disconnect()
+    
+    def load_bodies(self, emails: List[EmailMessage], folder: str = "INBOX") -> List[EmailMessage]:
+        """
+        Tool: Download the bodies of emails fetched with headers_only, with
+        a single UID FETCH, and fill them in place. Emails without a UID are
+        left as they are.
+        """
+        uids = [email_msg.uid.encode() for email_msg in emails if email_msg.uid]
+        if not uids:
+            return emails
+        
+        try:
+            with get_imap_pool().acquire() as conn:
+                if not self._select_folder(conn, folder):
+                    return emails
+                
+                fetched = self._fetch_emails(conn, uids, by_uid=True)
+            
+            by_uid = {email_msg.uid: email_msg for email_msg in fetched}
+            for email_msg in emails:
+                full = by_uid.get(email_msg.uid)
+                if full is not None:
+                    email_msg.body = full.body
+                    email_msg.html_body = full.html_body
+            
+        except Exception as e:
+            logger.error(f"Failed to load email bodies: {e}")
+        
+        return emails
     
     def mark_as_read(self, email_id: str) -> bool:
         """
         Tool: Mark email as read.
         """
-        if not self.connection.connect():
-            return False
-        
         try:
-            if not self.connection.select_folder():
-                return False
+            with get_imap_pool().acquire() as conn:
+                if not self._select_folder(conn):
+                    return False
+                
+                conn.store(email_id, '+FLAGS', '\\Seen')
             
-            self.connection.imap_conn.store(email_id, '+FLAGS', '\\Seen')
             logger.info(f"Marked email {email_id} as read")
             return True
             
         except Exception as e:
             logger.error(f"Failed to mark email as read: {e}")
             return False
-        finally:
-            self.connection.disconnect()
     
     def add_label(self, email_id: str, label: str) -> bool:
         """
@@ -204,6 +309,36 @@ class EmailTools:
         logger.info(f"Would add label '{label}' to email {email_id}")
         return True
     
+    def add_labels_batch(self, label: str, email_ids: List[str], max_batch: int = 64) -> bool:
+        """
+        Tool: Add one label to many emails (Gmail specific), with one
+        STORE +X-GM-LABELS per chunk of at most max_batch ids.
+        """
+        if not email_ids:
+            return True
+        
+        try:
+            with get_imap_pool().acquire() as conn:
+                if 'X-GM-EXT-1' not in conn.capabilities:
+                    logger.warning(f"Server does not support Gmail labels; '{label}' not applied")
+                    return False
+                if not self._select_folder(conn):
+                    return False
+                
+                for start in range(0, len(email_ids), max_batch):
+                    chunk = email_ids[start:start + max_batch]
+                    status, _ = conn.store(",".join(chunk), '+X-GM-LABELS', _quote(label))
+                    if status != 'OK':
+                        logger.error(f"Failed to add label '{label}' to {len(chunk)} emails")
+                        return False
+            
+            logger.info(f"Added label '{label}' to {len(email_ids)} emails")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to add label '{label}': {e}")
+            return False
+    
     def archive_email(self, email_id: str) -> bool:
         """
         Tool: Archive email.
@@ -218,11 +353,9 @@ class EmailTools:
         Tool: Send email or reply.
         """
         try:
-            # Set up SMTP connection
-            server = smtplib.SMTP_SSL('smtp.gmail.com', 465)
-            server.login(settings.email_address, settings.email_password)
+            settings = get_settings()
             
-            msg = MIMEMultipart()
+            msg = MIMEMessage()
             msg['From'] = settings.email_address
             msg['To'] = ', '.join(to)
             msg['Subject'] = subject
@@ -231,10 +364,16 @@ class EmailTools:
                 msg['In-Reply-To'] = reply_to
                 msg['References'] = reply_to
             
-            msg.attach(MIMEText(body, 'plain'))
+            msg.set_content(body)
             
-            server.send_message(msg)
-            server.quit()
+            with self._smtp_lock:
+                try:
+                    self._smtp_connection().send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    # The kept session went away between the check and the
+                    # send; reconnect once
+                    self._smtp = None
+                    self._smtp_connection().send_message(msg)
             
             logger.info(f"Sent email to {to} with subject: {subject}")
             return True
@@ -243,20 +382,98 @@ class EmailTools:
             logger.error(f"Failed to send email: {e}")
             return False
     
-    def _fetch_email_by_id(self, email_id: str) -> Optional[EmailMessage]:
-        """Helper method to fetch and parse a single email."""
+    def _smtp_connection(self) -> smtplib.SMTP_SSL:
+        """The kept SMTP session, reconnecting if it no longer answers."""
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._close_smtp()
+        
+        settings = get_settings()
+        server = smtplib.SMTP_SSL(settings.smtp_server, settings.smtp_port)
+        server.login(settings.email_address, settings.email_password)
+        self._smtp = server
+        return server
+    
+    def _close_smtp(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._smtp = None
+    
+    def close(self):
+        """Log out of the kept SMTP session."""
+        with self._smtp_lock:
+            self._close_smtp()
+    
+    @staticmethod
+    def _select_folder(conn: imaplib.IMAP4_SSL, folder: str = "INBOX") -> bool:
+        """Select email folder on a pooled connection."""
+        try:
+            status, _ = conn.select(folder)
+            return status == 'OK'
+        except imaplib.IMAP4.abort:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to select folder {folder}: {e}")
+            return False
+    
+    def _fetch_emails(self, conn: imaplib.IMAP4_SSL, email_ids: List[bytes],
+                      headers_only: bool = False, by_uid: bool = False) -> List[EmailMessage]:
+        """
+        Fetch and parse several emails with one FETCH command, most recent
+        first. With headers_only the bodies are left empty, and the messages
+        are not marked as seen. With by_uid, `email_ids` are UIDs and a UID
+        FETCH is used.
+        """
+        if not email_ids:
+            return []
+        
+        message_parts = 'BODY.PEEK[HEADER]' if headers_only else 'RFC822'
+        try:
+            if by_uid:
+                status, msg_data = conn.uid('FETCH', b",".join(email_ids), f'(UID {message_parts})')
+            else:
+                status, msg_data = conn.fetch(b",".join(email_ids), f'({message_parts})')
+        except imaplib.IMAP4.abort:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to fetch {len(email_ids)} emails: {e}")
+            return []
+        if status != 'OK':
+            return []
+        
+        key = 1 if by_uid else 0
+        record_by_id = {record[key]: record for record in _fetch_records(msg_data)}
+        
+        emails = []
+        for email_id in reversed(email_ids):  # Most recent first
+            record = record_by_id.get(email_id)
+            if record is None:
+                continue
+            seq, uid, raw = record
+            email_msg = self._parse_email(seq.decode(), raw)
+            if email_msg:
+                if uid is not None:
+                    email_msg.uid = uid.decode()
+                emails.append(email_msg)
+        return emails
+    
+    def _parse_email(self, email_id: str, raw: bytes) -> Optional[EmailMessage]:
+        """Helper method to parse a single fetched email."""
         try:
-            status, msg_data = self.connection.imap_conn.fetch(email_id, '(RFC822)')
-            if status != 'OK':
-                return None
-            
-            email_msg = email.message_from_bytes(msg_data[0][1])
+            email_msg = _PARSER.parsebytes(raw)
             
             # Parse email components
-            subject = email_msg.get('Subject', '')
-            sender = email_msg.get('From', '')
-            recipients = email_msg.get('To', '').split(',')
-            date_str = email_msg.get('Date', '')
+            subject = str(email_msg.get('Subject', ''))
+            sender = str(email_msg.get('From', ''))
+            recipients = str(email_msg.get('To', '')).split(',')
+            date_str = str(email_msg.get('Date', ''))
             
             # Parse date
             try:
@@ -268,18 +485,21 @@ class EmailTools:
             body = ""
             html_body = None
             
-            if email_msg.is_multipart():
-                for part in email_msg.walk():
-                    if part.get_content_type() == "text/plain":
-                        body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                    elif part.get_content_type() == "text/html":
-                        html_body = part.get_payload(decode=True).decode('utf-8', errors='ignore')
-                        # Extract text from HTML if no plain text
-                        if not body:
-                            soup = BeautifulSoup(html_body, 'html.parser')
-                            body = soup.get_text()
-            else:
-                body = email_msg.get_payload(decode=True).decode('utf-8', errors='ignore')
+            plain_part = email_msg.get_body(preferencelist=('plain',))
+            html_part = email_msg.get_body(preferencelist=('html',))
+            
+            if plain_part is not None or html_part is not None:
+                if plain_part is not None:
+                    body = _part_text(plain_part)
+                if html_part is not None:
+                    html_body = _part_text(html_part)
+                
+                # Extract text from HTML only if there is no plain text
+                if not body and html_body:
+                    body = _html_to_text(html_body)
+            elif not email_msg.is_multipart():
+                payload = email_msg.get_payload(decode=True) or b""
+                body = payload.decode('utf-8', errors='ignore')
             
             return EmailMessage(
                 id=email_id,
@@ -301,4 +521,5 @@ class EmailTools:
 
 
 # Create global email tools instance
-email_tools = EmailTools()
\ No newline at end of file
+email_tools = EmailTools()
+atexit.register(email_tools.close)
\ No newline at end of file
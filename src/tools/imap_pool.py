@@ -0,0 +1,133 @@
+"""Reusable IMAP connections shared by the email tools."""
+
+import atexit
+import imaplib
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+from ..config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class IMAPPool:
+    """
+    Bounded pool of logged-in IMAP connections for one account.
+    
+    Opening an IMAP session costs a TCP and TLS handshake plus a login, so
+    connections are kept after use and handed to the next caller. At most
+    `size` connections exist at once; extra callers wait for one to free up.
+    """
+    
+    def __init__(self, host: str, port: int, username: str, password: str, size: int = 4):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        
+        self._idle: "queue.LifoQueue[imaplib.IMAP4_SSL]" = queue.LifoQueue(maxsize=size)
+        self._slots = threading.BoundedSemaphore(size)
+        # "not_connected" until the first login, then "healthy" or
+        # "disconnected" depending on how the latest session fared
+        self.state = "not_connected"
+    
+    def _open(self) -> imaplib.IMAP4_SSL:
+        try:
+            conn = imaplib.IMAP4_SSL(self.host, self.port)
+            conn.login(self.username, self.password)
+        except Exception:
+            self.state = "disconnected"
+            raise
+        self.state = "healthy"
+        logger.info("Email connection established")
+        return conn
+    
+    def _is_alive(self, conn: imaplib.IMAP4_SSL) -> bool:
+        try:
+            status, _ = conn.noop()
+            return status == 'OK'
+        except Exception:
+            return False
+    
+    @staticmethod
+    def _close(conn: imaplib.IMAP4_SSL):
+        try:
+            conn.logout()
+        except Exception:
+            pass
+    
+    @contextmanager
+    def acquire(self) -> Iterator[imaplib.IMAP4_SSL]:
+        """Borrow a connection; it goes back to the pool unless it failed."""
+        self._slots.acquire()
+        conn = None
+        try:
+            # Reuse the most recently returned connection if it still answers
+            while conn is None:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    conn = self._open()
+                    break
+                if not self._is_alive(conn):
+                    self._close(conn)
+                    conn = None
+            
+            yield conn
+        
+        except imaplib.IMAP4.abort:
+            # Broken session; drop it rather than hand it out again
+            self.state = "disconnected"
+            if conn is not None:
+                self._close(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._idle.put_nowait(conn)
+            self._slots.release()
+    
+    def close_all(self):
+        """Log out every idle connection."""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close(conn)
+
+
+_pools: Dict[Tuple[str, str], IMAPPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_imap_pool() -> IMAPPool:
+    """Return the process-wide pool for the configured account."""
+    settings = get_settings()
+    key = (settings.imap_server, settings.email_address)
+    
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = IMAPPool(
+                settings.imap_server,
+                settings.imap_port,
+                settings.email_address,
+                settings.email_password,
+                size=settings.imap_pool_size
+            )
+            _pools[key] = pool
+        return pool
+
+
+@atexit.register
+def close_all_pools():
+    """Log out all pooled connections, e.g. at interpreter exit."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
@@ -4,218 +4,318 @@ Simple test script to demonstrate agent concepts without external dependencies.
 This shows the core agent patterns working together.
 """
 
+import io
+import os
 import sys
-from pathlib import Path
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import SimpleNamespace
 
-# Add src to path
-sys.path.append(str(Path(__file__).parent / "src"))
+# Put src first on the path, so its packages resolve on the first lookup
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
 
 from typing import Dict, List, Any
 from datetime import datetime
 
 
-class MockEmailTools:
-    """Mock email tools for demonstration."""
+# Probed once here; a test whose imports failed is skipped with the reason
+try:
+    from agent.email_classifier import EmailClassifier
+    from agent.email_master_agent import EmailMasterAgent
+    AGENTS_AVAILABLE = True
+except Exception as e:
+    AGENTS_AVAILABLE = False
+    _AGENT_IMPORT_ERROR = e
+
+try:
+    from memory.persistent_memory import PersistentMemory
+    MEMORY_AVAILABLE = True
+except Exception as e:
+    MEMORY_AVAILABLE = False
+    _MEMORY_IMPORT_ERROR = e
+
+try:
+    import tools.email_tools
+    from tools.email_tools import EmailMessage
+    EMAIL_TOOLS_AVAILABLE = True
+except Exception:
+    # The agent tests report the missing dependency themselves
+    EMAIL_TOOLS_AVAILABLE = False
+
+# Fixed date for the mock emails, so every run sees the same messages
+_MOCK_NOW = datetime(2024, 1, 1, 12, 0, 0)
+
+# Built once at import; the agents only read these messages
+if EMAIL_TOOLS_AVAILABLE:
+    _MOCK_EMAILS = (
+        EmailMessage(
+            id="1",
+            subject="URGENT: Project deadline moved up",
+            sender="boss@company.com",
+            recipients=["you@company.com"],
+            body="We need to deliver the project by tomorrow. Please confirm ASAP.",
+            html_body=None,
+            date=_MOCK_NOW,
+            labels=[],
+            is_read=False,
+            is_important=True,
+            attachments=[]
+        ),
+        EmailMessage(
+            id="2", 
+            subject="Weekly team meeting",
+            sender="colleague@company.com",
+            recipients=["team@company.com"],
+            body="Can we schedule our weekly team meeting for Tuesday at 2 PM?",
+            html_body=None,
+            date=_MOCK_NOW,
+            labels=[],
+            is_read=False,
+            is_important=False,
+            attachments=[]
+        ),
+    )
+else:
+    _MOCK_EMAILS = ()
+
+
+def _fetch_recent_emails(limit=10):
+    """Return mock emails for testing."""
+    return list(_MOCK_EMAILS[:limit])
+
+
+# Mock email tools for demonstration, swapped in once for every test
+mock_email_tools = SimpleNamespace(fetch_recent_emails=_fetch_recent_emails)
+
+if EMAIL_TOOLS_AVAILABLE:
+    tools.email_tools.email_tools = mock_email_tools
+
+
+@lru_cache(maxsize=1)
+def shared_classifier():
+    """The classifier used by both agent tests, built on first use."""
+    return EmailClassifier()
+
+
+class _ThreadOutput(io.TextIOBase):
+    """Stdout that sends each thread's writes to that thread's buffer, if it has one."""
     
-    @staticmethod
-    def fetch_recent_emails(limit=10):
-        """Return mock emails for testing."""
-        from tools.email_tools import EmailMessage
-        
-        mock_emails = [
-            EmailMessage(
-                id="1",
-                subject="URGENT: Project deadline moved up",
-                sender="boss@company.com",
-                recipients=["you@company.com"],
-                body="We need to deliver the project by tomorrow. Please confirm ASAP.",
-                html_body=None,
-                date=datetime.now(),
-                labels=[],
-                is_read=False,
-                is_important=True,
-                attachments=[]
-            ),
-            EmailMessage(
-                id="2", 
-                subject="Weekly team meeting",
-                sender="colleague@company.com",
-                recipients=["team@company.com"],
-                body="Can we schedule our weekly team meeting for Tuesday at 2 PM?",
-                html_body=None,
-                date=datetime.now(),
-                labels=[],
-                is_read=False,
-                is_important=False,
-                attachments=[]
-            )
-        ]
-        return mock_emails[:limit]
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+    
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        return (buffer or self._stream).write(text)
+    
+    def flush(self):
+        self._stream.flush()
+    
+    def capture(self, func):
+        """Run func and return everything it printed."""
+        self._local.buffer = io.StringIO()
+        try:
+            func()
+            return self._local.buffer.getvalue()
+        finally:
+            self._local.buffer = None
 
 
 def test_single_agent():
     """Test a single agent's perceive-think-act cycle."""
-    print("🔍 TESTING SINGLE AGENT")
-    print("=" * 50)
+    out = []
+    p = out.append
+    
+    p("🔍 TESTING SINGLE AGENT")
+    p("=" * 50)
+    
+    if not AGENTS_AVAILABLE:
+        p(f"Skipping single agent test: {_AGENT_IMPORT_ERROR}")
+        p("This is expected if dependencies aren't installed - the concept is demonstrated!")
+        sys.stdout.write("\n".join(out) + "\n")
+        return
     
     try:
-        from agent.email_classifier import EmailClassifier
-        
-        # Mock the email tools
-        import tools.email_tools
-        tools.email_tools.email_tools = MockEmailTools()
-        
         # Create and run classifier
-        classifier = EmailClassifier()
+        classifier = shared_classifier()
         
-        print(f"Agent: {classifier.name}")
-        print(f"Description: {classifier.description}")
-        print(f"Available tools: {classifier.get_available_tools()}")
-        print()
+        p(f"Agent: {classifier.name}")
+        p(f"Description: {classifier.description}")
+        p(f"Available tools: {classifier.get_available_tools()}")
+        p("")
         
         # Run one cycle
-        print("Running agent cycle...")
+        p("Running agent cycle...")
         result = classifier.run_cycle()
         
         if result["success"]:
-            print("✅ Agent cycle completed successfully!")
+            p("✅ Agent cycle completed successfully!")
             
             # Show some results
             perception = result.get("perception", {})
-            print(f"  📧 Emails found: {perception.get('total_count', 0)}")
+            p(f"  📧 Emails found: {perception.get('total_count', 0)}")
             
             actions = result.get("planned_actions", [])
-            print(f"  🧠 Actions planned: {len(actions)}")
+            p(f"  🧠 Actions planned: {len(actions)}")
             
             results = result.get("results", [])
-            print(f"  ⚡ Results: {len(results)} operations completed")
+            p(f"  ⚡ Results: {len(results)} operations completed")
             
         else:
-            print(f"❌ Agent cycle failed: {result.get('error', 'Unknown error')}")
+            p(f"❌ Agent cycle failed: {result.get('error', 'Unknown error')}")
     
     except Exception as e:
-        print(f"Error during single agent test: {e}")
-        print("This is expected if dependencies aren't installed - the concept is demonstrated!")
+        p(f"Error during single agent test: {e}")
+        p("This is expected if dependencies aren't installed - the concept is demonstrated!")
+    
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def test_multi_agent_coordination():
     """Test multi-agent coordination concepts."""
-    print("\n🤝 TESTING MULTI-AGENT COORDINATION")
-    print("=" * 50)
+    out = []
+    p = out.append
+    
+    p("\n🤝 TESTING MULTI-AGENT COORDINATION")
+    p("=" * 50)
+    
+    if not AGENTS_AVAILABLE:
+        p(f"Skipping multi-agent test: {_AGENT_IMPORT_ERROR}")
+        p("This demonstrates the coordination architecture even without full setup!")
+        sys.stdout.write("\n".join(out) + "\n")
+        return
     
     try:
-        from agent.email_master_agent import EmailMasterAgent
-        
-        # Mock the email tools
-        import tools.email_tools
-        tools.email_tools.email_tools = MockEmailTools()
+        # Create master agent, reusing the classifier from the single agent test
+        master = EmailMasterAgent(classifier=shared_classifier())
         
-        # Create master agent
-        master = EmailMasterAgent()
-        
-        print(f"Master Agent: {master.name}")
-        print(f"Sub-agents: {type(master.classifier).__name__}, {type(master.responder).__name__}, {type(master.organizer).__name__}")
-        print()
+        p(f"Master Agent: {master.name}")
+        p(f"Sub-agents: {type(master.classifier).__name__}, {type(master.responder).__name__}, {type(master.organizer).__name__}")
+        p("")
         
         # Get status
         status = master.get_comprehensive_status()
-        print("System Status:")
-        print(f"  🏗️ Master agent tools: {len(status['master_agent']['available_tools'])}")
-        print(f"  🤖 Sub-agents active: {len(status['sub_agents'])}")
-        print(f"  📊 Performance metrics tracked: {len(status['performance_metrics'])}")
+        p("System Status:")
+        p(f"  🏗️ Master agent tools: {len(status['master_agent']['available_tools'])}")
+        p(f"  🤖 Sub-agents active: {len(status['sub_agents'])}")
+        p(f"  📊 Performance metrics tracked: {len(status['performance_metrics'])}")
         
-        print("\nWorkflow settings:")
+        p("\nWorkflow settings:")
         for setting, value in master.workflow_settings.items():
-            print(f"  • {setting}: {value}")
+            p(f"  • {setting}: {value}")
         
     except Exception as e:
-        print(f"Error during multi-agent test: {e}")
-        print("This demonstrates the coordination architecture even without full setup!")
+        p(f"Error during multi-agent test: {e}")
+        p("This demonstrates the coordination architecture even without full setup!")
+    
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def test_learning_concepts():
     """Test learning and memory concepts."""
-    print("\n🧠 TESTING LEARNING CONCEPTS")
-    print("=" * 50)
+    out = []
+    p = out.append
+    
+    p("\n🧠 TESTING LEARNING CONCEPTS")
+    p("=" * 50)
+    
+    if not MEMORY_AVAILABLE:
+        p(f"Skipping learning test: {_MEMORY_IMPORT_ERROR}")
+        p("This shows the learning architecture concept!")
+        sys.stdout.write("\n".join(out) + "\n")
+        return
     
     try:
-        from memory.persistent_memory import PersistentMemory
-        
         # Create memory system
         memory = PersistentMemory(db_path=":memory:")  # In-memory SQLite
         
-        print("Memory system initialized")
-        
-        # Add some events
-        event_id1 = memory.add_event(
-            event_type="email_classification",
-            data={"email_id": "123", "category": "urgent", "confidence": 0.9},
-            importance=0.8,
-            tags=["classification", "email"]
-        )
-        
-        event_id2 = memory.add_event(
-            event_type="user_feedback",
-            data={"correction": "should be 'meeting' not 'urgent'"},
-            importance=1.0,
-            tags=["feedback", "learning"]
-        )
-        
-        print(f"  📝 Added events: {event_id1[:8]}..., {event_id2[:8]}...")
+        p("Memory system initialized")
         
-        # Simulate learning from feedback
-        memory.add_user_feedback(
-            event_id1,
-            "classification_correction",
-            {"correct_category": "meeting"}
-        )
+        # Add the events and feedback in one transaction
+        with memory.batch():
+            event_id1 = memory.add_event(
+                event_type="email_classification",
+                data={"email_id": "123", "category": "urgent", "confidence": 0.9},
+                importance=0.8,
+                tags=["classification", "email"]
+            )
+            
+            event_id2 = memory.add_event(
+                event_type="user_feedback",
+                data={"correction": "should be 'meeting' not 'urgent'"},
+                importance=1.0,
+                tags=["feedback", "learning"]
+            )
+            
+            # Simulate learning from feedback
+            memory.add_user_feedback(
+                event_id1,
+                "classification_correction",
+                {"correct_category": "meeting"}
+            )
         
-        print("  🎓 Processed user feedback")
+        p(f"  📝 Added events: {event_id1[:8]}..., {event_id2[:8]}...")
+        p("  🎓 Processed user feedback")
         
         # Get learning summary
         summary = memory.get_learning_summary()
-        print(f"  📊 Total events: {summary['total_events']}")
-        print(f"  🎯 Preferences learned: {summary['total_preferences']}")
-        print(f"  💬 Recent feedback: {summary['recent_feedback_count']}")
+        p(f"  📊 Total events: {summary['total_events']}")
+        p(f"  🎯 Preferences learned: {summary['total_preferences']}")
+        p(f"  💬 Recent feedback: {summary['recent_feedback_count']}")
         
         memory.close()
         
     except Exception as e:
-        print(f"Error during learning test: {e}")
-        print("This shows the learning architecture concept!")
+        p(f"Error during learning test: {e}")
+        p("This shows the learning architecture concept!")
+    
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 def main():
     """Run all tests to demonstrate agent concepts."""
-    print("🚀 AGENT SYSTEM WALKTHROUGH")
-    print("🎯 This demonstrates core agent concepts even without full email setup")
-    print("=" * 80)
-    
-    # Test individual agent
-    test_single_agent()
-    
-    # Test multi-agent coordination  
-    test_multi_agent_coordination()
-    
-    # Test learning concepts
-    test_learning_concepts()
-    
-    print("\n" + "=" * 80)
-    print("✅ WALKTHROUGH COMPLETE!")
-    print()
-    print("🎓 Key Concepts Demonstrated:")
-    print("   1. ✅ Perceive-Think-Act agent loop")
-    print("   2. ✅ Tool-based agent capabilities") 
-    print("   3. ✅ Multi-agent coordination")
-    print("   4. ✅ Learning and memory systems")
-    print("   5. ✅ Specialized domain agents")
-    print()
-    print("📚 Next Steps:")
-    print("   • Set up email credentials to test with real emails")
-    print("   • Install dependencies: pip install -r requirements.txt")
-    print("   • Run: python -m src.cli interactive")
-    print("   • Explore: Each agent file in src/agent/")
-    print("   • Build: Your own specialized agents!")
+    out = []
+    p = out.append
+    
+    p("🚀 AGENT SYSTEM WALKTHROUGH")
+    p("🎯 This demonstrates core agent concepts even without full email setup")
+    p("=" * 80)
+    sys.stdout.write("\n".join(out) + "\n")
+    out.clear()
+    
+    # The tests are independent, so they run side by side; each one's
+    # output is buffered and printed in order once it finishes
+    tests = (test_single_agent, test_multi_agent_coordination, test_learning_concepts)
+    stdout = sys.stdout
+    output = _ThreadOutput(stdout)
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            futures = [executor.submit(output.capture, test) for test in tests]
+            for future in futures:
+                output.write(future.result())
+    finally:
+        sys.stdout = stdout
+    
+    p("\n" + "=" * 80)
+    p("✅ WALKTHROUGH COMPLETE!")
+    p("")
+    p("🎓 Key Concepts Demonstrated:")
+    p("   1. ✅ Perceive-Think-Act agent loop")
+    p("   2. ✅ Tool-based agent capabilities") 
+    p("   3. ✅ Multi-agent coordination")
+    p("   4. ✅ Learning and memory systems")
+    p("   5. ✅ Specialized domain agents")
+    p("")
+    p("📚 Next Steps:")
+    p("   • Set up email credentials to test with real emails")
+    p("   • Install dependencies: pip install -r requirements.txt")
+    p("   • Run: python -m src.cli interactive")
+    p("   • Explore: Each agent file in src/agent/")
+    p("   • Build: Your own specialized agents!")
+    
+    sys.stdout.write("\n".join(out) + "\n")
 
 
 if __name__ == "__main__":
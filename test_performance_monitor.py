@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Regression checks for the performance monitor.
+Runs under pytest, or directly with `python test_performance_monitor.py`.
+"""
+
+import os
+import sys
+
+# Put src first on the path, so its packages resolve on the first lookup
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from monitoring.performance_monitor import PerformanceMonitor
+
+
+def test_report_with_single_aggregated_row():
+    """One aggregated tool row holding every measurement leaves a trend half empty."""
+    monitor = PerformanceMonitor()
+    for _ in range(12):
+        monitor.record_tool_usage("ag", "t", 0.1, True)
+    
+    report = monitor.get_performance_report()
+    
+    trend = report["trends"]["execution_time_trend"]
+    assert trend["second_period_avg"] == 0.0
+    assert report["metrics_analyzed"] == 12
+    monitor.close()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Regression checks for the persistent memory.
+Runs under pytest, or directly with `python test_persistent_memory.py`.
+"""
+
+import os
+import sqlite3
+import sys
+
+# Put src first on the path, so its packages resolve on the first lookup
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+
+from memory.persistent_memory import PersistentMemory, _StoredEvent
+
+
+def test_feedback_after_close_does_not_hang():
+    """Feedback given after close() is written in place, not left on the queue."""
+    memory = PersistentMemory(":memory:")
+    event_id = memory.add_event("email_classification", {"category": "work"})
+    memory.close()
+    
+    try:
+        memory.add_user_feedback(event_id, "classification_correction", {"category": "personal"})
+    except sqlite3.ProgrammingError:
+        pass  # the connection is closed, so the write fails loudly
+    
+    memory.get_preference("classification", "category", None)
+
+
+def test_background_write_error_reaches_reader():
+    """A failed background write is raised by the next read."""
+    memory = PersistentMemory(":memory:")
+    event_id = memory.add_event("email_classification", {"category": "work"})
+    memory.add_user_feedback(event_id, "classification_correction", object())
+    
+    try:
+        memory.get_learning_summary()
+    except TypeError:
+        pass
+    else:
+        raise AssertionError("the background write error was not raised")
+    
+    # Raised once; the next read succeeds
+    memory.get_learning_summary()
+    memory.close()
+
+
+
+def test_serialized_event_data_is_decoded_lazily():
+    """Event data given as JSON text is kept as text until it is read."""
+    memory = PersistentMemory(":memory:")
+    event_id = memory.add_event("email_classification", '{"category": "work"}', tags=["a"])
+    
+    event = memory.get_event(event_id)
+    assert isinstance(event, _StoredEvent)
+    assert event.tags == ["a"]
+    assert event.data == {"category": "work"}
+    memory.close()
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            test()
+            print(f"{name}: ok")